@@ -2,13 +2,16 @@ import streamlit as st
 import sqlite3
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-from io import BytesIO
-from xlsxwriter import Workbook
+import time
+
+import asx_scraper
+import data_cache
+import excel_export
+import futures_db
+import perf
+import pricing
+import simulation
+import table_render
 
 
 #########################################################################################################
@@ -17,29 +20,13 @@ from xlsxwriter import Workbook
 #########################################################################################################
 #########################################################################################################
 
-# Maps contract-btn data-code → DB column name.
-# H = Base Strip product; N/V/Q/S = NSW/VIC/QLD/SA
-_BASE_STRIP_CODES = {
-    'HN': 'NSW',
-    'HV': 'VIC',
-    'HQ': 'QLD',
-    'HS': 'SA',
-}
-
-_ASX_URL = 'https://www.asxenergy.com.au/futures/au_electricity'
-
-_REQUEST_HEADERS = {
-    'User-Agent': (
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-        'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
-    )
-}
-
-
-def scrape_and_save():
+def parse_asx_page(content):
     """
-    Fetches FY (Financial Year) Base Strip settle prices from the ASX Energy
-    futures page and returns a DataFrame with columns:
+    Parses FY (Financial Year) Base Strip settle prices from a raw ASX Energy
+    futures page. Streamlit-free, so one parse can be shared by every session
+    (see data_cache.parse_page).
+
+    Returns (df, page_date, warnings) where df has columns:
         Quote Date | Year | NSW | VIC | QLD | SA
 
     FY rows (FY27, FY28, FY29) provide three data points per state, matching
@@ -48,136 +35,112 @@ def scrape_and_save():
     Weekend behaviour:
       The new ASX page always shows the current calendar date, not the last
       trading day. On weekends the settle prices shown are Friday's settlement
-      figures. This function detects weekends, derives the last trading day
-      (Saturday → Friday, Sunday → Friday), and uses that as the Quote Date.
-      The session state flag 'is_weekend_display' is set so the UI can show
-      an explanatory banner. The database write uses the derived Friday date,
-      and the existing PRIMARY KEY constraint silently prevents duplicates if
-      Friday's data was already written by the automated GitHub Action.
+      figures, so the last trading day (Saturday → Friday, Sunday → Friday)
+      is used as the Quote Date. The database write uses the derived Friday
+      date, and the existing PRIMARY KEY constraint silently prevents
+      duplicates if Friday's data was already written by the GitHub Action.
 
-    Returns an empty DataFrame only on a genuine fetch or parse failure.
+    Raises ValueError when the page has no market date or no complete year.
     """
-    try:
-        response = requests.get(_ASX_URL, headers=_REQUEST_HEADERS, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # ── Parse market date ──────────────────────────────────────────────────
-        date_container = soup.find(id='refresh-container-market_date')
-        if not date_container:
-            st.error("Could not find the market date on the ASX page.")
-            return pd.DataFrame()
+    warnings = []
+    with perf.span('parse.soup'):
+        soup = asx_scraper.make_soup(content)
+
+    # ── Parse market date ──────────────────────────────────────────────────────
+    page_date = asx_scraper.parse_market_date(soup)
+    if page_date is None:
+        raise ValueError("Could not find or parse the market date on the ASX page.")
+    quote_date = asx_scraper.last_trading_day(page_date)
+
+    # ── Extract FY prices per state ────────────────────────────────────────────
+    # Every contract table is indexed in one pass over the parsed page
+    with perf.span('parse.tables'):
+        tables = asx_scraper.index_contract_tables(soup, warnings.append)
+        for code, state in asx_scraper.BASE_STRIP_CODES.items():
+            if code not in tables:
+                warnings.append(f"Could not find Base Strip table for {state} (code: {code})")
+
+        prices_by_year = asx_scraper.extract_base_strip_prices(tables)
+
+    # ── Build DataFrame ────────────────────────────────────────────────────────
+    rows = []
+    for year in sorted(prices_by_year):
+        sd      = prices_by_year[year]
+        missing = [s for s in ('NSW', 'VIC', 'QLD', 'SA') if s not in sd]
+        if missing:
+            warnings.append(f"Year {year} missing data for {missing} — row skipped.")
+            continue
+        rows.append({
+            'Quote Date': quote_date,
+            'Year':       year,
+            'NSW':        sd['NSW'],
+            'VIC':        sd['VIC'],
+            'QLD':        sd['QLD'],
+            'SA':         sd['SA'],
+        })
+
+    if not rows:
+        raise ValueError("No complete year/state data found on the ASX page.")
+
+    return pd.DataFrame(rows), page_date, tuple(warnings)
+
+
+def fetch_asx_curve():
+    """
+    Live scrape for data_cache.fetch_latest_curve: pooled, retried
+    conditional fetch with a hard latency budget (the body is archived under
+    archive/asx), parsed once per distinct page for the whole process.
+    """
+    # requests and the archive are only loaded once someone fetches
+    import asx_archive
+
+    with perf.span('asx.fetch'):
+        page = asx_archive.fetch_snapshot(asx_scraper.ASX_URL, caller='hum')
+    if page is None:
+        raise ValueError("Failed to retrieve ASX page (no response within the time budget).")
+    # Every body is parsed whether or not it changed, so the app's own
+    # validators can be recorded straight away; the daily job keeps its own
+    asx_archive.record_fetch(asx_scraper.ASX_URL, page, caller='hum')
+    with perf.span('parse.page'):
+        df, page_date, warnings = data_cache.parse_page(page.digest, page.content, parse_asx_page)
+    return data_cache.CurveFetch(
+        df, page_date, asx_scraper.last_trading_day(page_date), warnings, 'asx', time.time()
+    )
 
-        pre = date_container.find('pre')
-        if not pre:
-            st.error("Could not find the date <pre> element on the ASX page.")
-            return pd.DataFrame()
 
-        raw        = pre.get_text()
-        first_line = raw.split('\n')[0].replace('\xa0', '').replace('\u00a0', '').strip()
+def scrape_and_save():
+    """
+    Returns the current FY Base Strip curve (see parse_asx_page) together
+    with its source: 'asx' when this click fetched it, 'cache' when another
+    session fetched it within the last few minutes, or 'database' when the
+    daily job has already stored today's curve. Concurrent clicks share one
+    ASX request (data_cache.fetch_latest_curve).
 
-        try:
-            page_date = datetime.strptime(first_line, '%a %d %b %Y').date()
-        except ValueError:
-            st.error(f"Could not parse market date: '{first_line}'")
-            return pd.DataFrame()
-
-        # ── Weekend handling ───────────────────────────────────────────────────
-        # The page date is always today's calendar date. On weekends the settle
-        # prices are Friday's settlement figures, but the page date says Sat/Sun.
-        # We derive the last trading day and use it as the Quote Date so data is
-        # correctly labelled and stored. The DB PRIMARY KEY prevents duplication
-        # if the Friday Action already ran.
-        if page_date.weekday() >= 5:  # 5 = Saturday, 6 = Sunday
-            days_back  = 1 if page_date.weekday() == 5 else 2
-            quote_date = page_date - timedelta(days=days_back)
-            st.session_state['is_weekend_display'] = True
-            st.session_state['last_trading_day']   = quote_date
-        else:
-            quote_date = page_date
-            st.session_state['is_weekend_display'] = False
-            st.session_state['last_trading_day']   = quote_date
+    The session state flag 'is_weekend_display' is set so the UI can show
+    an explanatory banner.
 
-        # ── Extract FY prices per state ────────────────────────────────────────
-        prices_by_year: dict = {}
+    Returns an empty DataFrame only on a genuine fetch or parse failure.
+    """
+    try:
+        with perf.span('asx.latest_curve'):
+            result = data_cache.fetch_latest_curve(fetch_asx_curve, 'futures_prices.db')
+    except ValueError as e:
+        st.error(str(e))
+        return pd.DataFrame(), None
+    except Exception as e:
+        st.error(f"Unexpected error during scrape: {e}")
+        return pd.DataFrame(), None
 
-        for code, state in _BASE_STRIP_CODES.items():
+    for warning in result.warnings:
+        st.warning(warning)
 
-            btn = soup.find('button', class_='contract-btn', attrs={'data-code': code})
-            if not btn:
-                st.warning(f"Could not find Base Strip table for {state} (code: {code})")
-                continue
+    # Curves read back from the database carry no page date; a weekend is
+    # then recognised from today's market calendar date instead
+    page_date = result.page_date or asx_scraper.market_today()
+    st.session_state['is_weekend_display'] = page_date.weekday() >= 5   # 5 = Saturday, 6 = Sunday
+    st.session_state['last_trading_day']   = result.quote_date
 
-            outer = btn.find_parent(
-                'div',
-                class_=lambda c: c and 'shadow-md' in (c if isinstance(c, str) else ' '.join(c))
-            )
-            if not outer:
-                continue
-
-            container = outer.find('div', class_='data-table-container')
-            if not container:
-                continue
-
-            table = container.find('table')
-            tbody = table.find('tbody') if table else None
-            if not tbody:
-                continue
-
-            # Columns: Period | Bid | Ask | Last | +/- | Vol | Settle (index 6)
-            for row in tbody.find_all('tr'):
-                cells = row.find_all('td')
-                if len(cells) < 7:
-                    continue
-
-                label = cells[0].get_text(strip=True)   # e.g. "FY27", "CY27"
-                if not label.startswith('FY'):
-                    continue                              # skip CY strips
-
-                try:
-                    year = int('20' + label[2:])         # FY27 → 2027, FY28 → 2028, FY29 → 2029
-                except (ValueError, IndexError):
-                    continue
-
-                settle_text = cells[6].get_text(strip=True)
-                if settle_text == '-' or not settle_text:
-                    continue
-
-                try:
-                    price = round(float(settle_text), 2)
-                    prices_by_year.setdefault(year, {})[state] = price
-                except ValueError:
-                    continue
-
-        # ── Build DataFrame ────────────────────────────────────────────────────
-        rows = []
-        for year in sorted(prices_by_year):
-            sd      = prices_by_year[year]
-            missing = [s for s in ('NSW', 'VIC', 'QLD', 'SA') if s not in sd]
-            if missing:
-                st.warning(f"Year {year} missing data for {missing} — row skipped.")
-                continue
-            rows.append({
-                'Quote Date': quote_date,
-                'Year':       year,
-                'NSW':        sd['NSW'],
-                'VIC':        sd['VIC'],
-                'QLD':        sd['QLD'],
-                'SA':         sd['SA'],
-            })
-
-        if not rows:
-            st.error("No complete year/state data found on the ASX page.")
-            return pd.DataFrame()
-
-        return pd.DataFrame(rows)
-
-    except requests.RequestException as e:
-        st.error(f"Failed to retrieve ASX page: {e}")
-        return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Unexpected error during scrape: {e}")
-        return pd.DataFrame()
+    return result.curve.copy(), result.source
 
 
 # Function to apply escalation factors and format the table for display
@@ -217,39 +180,16 @@ def calculate_off_peak(peak_consumption, shoulder_consumption):
 def create_input_boxes():
     with st.sidebar:
         with st.expander("Consumption Data"):
-            total_consumption = st.number_input("Total Consumption (MWh)", min_value=0.00, value=400000.00, format="%.2f", step=10000.00)
-            peak_consumption = st.number_input("Peak Consumption (%)", value=50.00, format="%.2f", min_value=0.00, max_value=100.00, step=1.0)
-            shoulder_consumption = st.number_input("Shoulder Consumption (%)", value=00.00, format="%.2f", min_value=0.00, max_value=100.00, step=1.0)
+            total_consumption = st.number_input("Total Consumption (MWh)", min_value=0.00, value=pricing.DEFAULT_INPUTS['total_consumption'], format="%.2f", step=10000.00)
+            peak_consumption = st.number_input("Peak Consumption (%)", value=pricing.DEFAULT_INPUTS['peak_consumption'], format="%.2f", min_value=0.00, max_value=100.00, step=1.0)
+            shoulder_consumption = st.number_input("Shoulder Consumption (%)", value=pricing.DEFAULT_INPUTS['shoulder_consumption'], format="%.2f", min_value=0.00, max_value=100.00, step=1.0)
             off_peak_consumption = calculate_off_peak(peak_consumption, shoulder_consumption)
             st.write(f"Off-Peak Consumption: {off_peak_consumption}%")
-            load_factor = st.number_input("Load Factor", format="%.2f", value=0.55)
+            load_factor = st.number_input("Load Factor", format="%.2f", value=pricing.DEFAULT_INPUTS['load_factor'])
 
         with st.expander("Network Charges"):
-            network_options = {
-                "Energex 8300": {"Peak Charge": 2.8140,
-                                 "Off-Peak Charge": 2.8140,
-                                 "Shoulder Charge": 2.8140,
-                                 "NUOS Charge": 13.4270,
-                                 "Service Availability Charge": 7.7240},
-                "Energex 8100": {"Peak Charge": 1.3010,
-                                 "Off-Peak Charge": 1.3010,
-                                 "Shoulder Charge": 1.3010,
-                                 "NUOS Charge": 15.7730,
-                                 "Service Availability Charge": 37.7400},
-                "BLNT1AO":      {"Peak Charge": 20.4161,
-                                 "Off-Peak Charge": 8.4967,
-                                 "Shoulder Charge": 15.9733,
-                                 "NUOS Charge": 0.0000,
-                                 "Service Availability Charge": 2.2229},
-                "BLND3AO":      {"Peak Charge": 6.1763,
-                                 "Off-Peak Charge": 3.2273,
-                                 "Shoulder Charge": 4.9580,
-                                 "NUOS Charge": 0.0000,
-                                 "Service Availability Charge": 20.8017},
-            }
-
-            selected_network   = st.selectbox("Select Network", list(network_options.keys()))
-            default_values     = network_options[selected_network]
+            selected_network   = st.selectbox("Select Network", list(pricing.NETWORK_TARIFFS.keys()))
+            default_values     = pricing.NETWORK_TARIFFS[selected_network]
 
             peak_charge                 = st.number_input("Peak Charge (c/kWh)",                format="%.2f", value=default_values["Peak Charge"])
             off_peak_charge             = st.number_input("Off-Peak Charge (c/kWh)",            format="%.2f", value=default_values["Off-Peak Charge"])
@@ -258,25 +198,25 @@ def create_input_boxes():
             service_availability_charge = st.number_input("Service Availability Charge ($/day)", format="%.2f", value=default_values["Service Availability Charge"])
 
         with st.expander("System Charges"):
-            aemo = 0.09910
-            srec = 1.09040
-            lrec = 1.0000
+            aemo = pricing.DEFAULT_INPUTS['aemo_participant_charge']
+            srec = pricing.DEFAULT_INPUTS['srec_charge']
+            lrec = pricing.DEFAULT_INPUTS['lrec_charge']
             aemo_participant_charge        = st.number_input("AEMO Participant Charge (c/kWh)",       format="%.2f", value=aemo)
             aemo_ancillary_services_charge = st.number_input("AEMO Ancillary Services Charge (c/kWh)", format="%.2f", value=aemo)
             srec_charge                    = st.number_input("SREC Charge (c/kWh)",                   format="%.2f", value=srec)
             lrec_charge                    = st.number_input("LREC Charge (c/kWh)",                   format="%.2f", value=lrec)
 
         with st.expander("Service Charges"):
-            metering       = 100.00
-            retail_service = 0.00
-            admin          = 0.00
+            metering       = pricing.DEFAULT_INPUTS['metering_charge']
+            retail_service = pricing.DEFAULT_INPUTS['retail_service_charge']
+            admin          = pricing.DEFAULT_INPUTS['admin_charge']
             metering_charge       = st.number_input("Metering Charge ($/month)",       format="%.2f", value=metering,       step=1.0)
             retail_service_charge = st.number_input("Retail Service Charge ($/month)", format="%.2f", value=retail_service, step=1.0)
             admin_charge          = st.number_input("Admin Charge ($/month)",          format="%.2f", value=admin,          step=1.0)
 
         with st.expander('Escalation Factors'):
-            load   = st.number_input('Load Escalation Factor',   value=1.15, key="load_factor")
-            retail = st.number_input('Retail Escalation Factor', value=1.15, key="retail_factor")
+            load   = st.number_input('Load Escalation Factor',   value=pricing.DEFAULT_LOAD_ESCALATION, key="load_factor")
+            retail = st.number_input('Retail Escalation Factor', value=pricing.DEFAULT_RETAIL_ESCALATION, key="retail_factor")
 
     if 'load_factor' in st.session_state and 'retail_factor' in st.session_state:
         update_escalated_data(st.session_state['load_factor'], st.session_state['retail_factor'])
@@ -310,9 +250,25 @@ def create_input_boxes():
 #########################################################################################################
 #########################################################################################################
 
-def calculate_bulk_prices():
+def price_all_states(updated_df, fetched_data, inputs):
+    """
+    Prices every state and contract year in one batched call to the pricing
+    engine. The result is memoised in session state against the curve and the
+    sidebar inputs, so switching the state selectbox only re-slices the tables.
+    """
+    states   = list(pricing.STATES)
+    peak     = pricing.term_matrix(updated_df[states])
+    off_peak = pricing.term_matrix(fetched_data[states]) / 10
 
-    global energy_rates, summary_of_consumption, summary_of_charges, summary_of_costs, summary_of_rates, selected_state, bulk_price
+    key    = (peak.tobytes(), off_peak.tobytes(), tuple(sorted(inputs.items())))
+    cached = st.session_state.get('pricing_result')
+    if cached is None or cached[0] != key:
+        cached = (key, pricing.calculate_bulk_prices(peak, off_peak, **inputs))
+        st.session_state['pricing_result'] = cached
+    return cached[1]
+
+
+def calculate_bulk_prices(updated_df, fetched_data, inputs):
 
     selected_state = st.selectbox(
         "Select State",
@@ -320,192 +276,136 @@ def calculate_bulk_prices():
         key='selected_state'
     )
 
-    energy_rates = pd.DataFrame({
-        'Tariffs & Factors': [
-            'Peak Tariff (c/kWh)',
-            'Shoulder Tariff (c/kWh)',
-            'Off Peak Tariff (c/kWh)',
-            'Transmission Loss Factor',
-            'Distribution Loss Factor',
-            'Net Loss Factor (NLF)',
-            'Peak Tariff (Adj for Losses) (c/kWh)',
-            'Shoulder Tariff (Adj for Losses) (c/kWh)',
-            'Off Peak Tariff (Adj for Losses) (c/kWh)'],
-        'Year 1': [0.0] * 9, 'Year 2': [0.0] * 9, 'Year 3': [0.0] * 9, 'Average': [0.0] * 9,
-    })
-
-    summary_of_consumption = pd.DataFrame({
-        'Energy Consumption': [
-            'Total Consumption (kWh)',
-            'Peak Consumption (kWh)',
-            'Shoulder Consumption (kWh)',
-            'Off Peak Consumption (kWh)',
-            'Load Factor',
-            'Avg. Monthly Peak Demand (kVA)'],
-        'Year 1': [0.0] * 6, 'Year 2': [0.0] * 6, 'Year 3': [0.0] * 6, 'Average': [0.0] * 6,
-    })
-
-    summary_of_charges = pd.DataFrame({
-        'Costs per Unit': [
-            'Peak Energy Charge (c/kWh)',
-            'Shoulder Energy Charge (c/kWh)',
-            'Off Peak Energy Charge (c/kWh)',
-            'Peak Demand Charge ($/kVA)',
-            'Network Volume Charge (c/kWh)',
-            'Other Volume Charge (c/kWh)',
-            'Fixed Charge ($/day)'],
-        'Year 1': [0.0] * 7, 'Year 2': [0.0] * 7, 'Year 3': [0.0] * 7, 'Average': [0.0] * 7,
-    })
-
-    summary_of_costs = pd.DataFrame({
-        'Annual Costs': [
-            'Peak Energy Costs ($/year)',
-            'Shoulder Energy Costs ($/year)',
-            'Off Peak Energy Costs ($/year)',
-            'Peak Demand Costs ($/year)',
-            'Network Volume Costs ($/year)',
-            'Other Volume Costs ($/year)',
-            'Fixed Costs ($/year)',
-            'Total Costs ($/year)',
-            'kWh/year',
-            'Bundled Bulk Cost ($/kWh)'],
-        'Year 1': [0.0] * 10, 'Year 2': [0.0] * 10, 'Year 3': [0.0] * 10, 'Average': [0.0] * 10,
-    })
-
-    summary_of_rates = pd.DataFrame({
-        'Rates Summary': [
-            'Energy ($/kWh)',
-            'Network ($/kWh)',
-            'Other ($/kWh)',
-            'Fixed ($/kWh)',
-            'Total ($/kWh)'],
-        'Year 1': [0.0] * 5, 'Year 2': [0.0] * 5, 'Year 3': [0.0] * 5, 'Average': [0.0] * 5,
-    })
-
-    if not st.session_state['updated_df'].empty:
-
-        # How many FY years were returned by the scraper (typically 3: FY27, FY28, FY29).
-        # iloc_idx clamps Year 3 to the last available row as a safety net
-        # in case fewer than 3 rows are returned on any given day.
-        num_available = len(st.session_state['updated_df'])
-
-        for year in range(1, 4):
-
-            iloc_idx = min(year - 1, num_available - 1)
-
-            peak_rate     = st.session_state['updated_df'][selected_state].iloc[iloc_idx]
-            shoulder_rate = st.session_state['updated_df'][selected_state].iloc[iloc_idx]
-            off_peak_rate = st.session_state['fetched_data'][selected_state].iloc[iloc_idx] / 10
-
-            transmission_loss_factor = 1.00860
-            distribution_loss_factor = 1.04344
-            net_loss_factor          = transmission_loss_factor * distribution_loss_factor
-            peak_energy_adj          = peak_rate     * net_loss_factor
-            shoulder_energy_adj      = shoulder_rate * net_loss_factor
-            off_peak_energy_adj      = off_peak_rate * net_loss_factor
-
-            energy_rates.at[0, f'Year {year}'] = float(peak_rate)
-            energy_rates.at[1, f'Year {year}'] = float(shoulder_rate)
-            energy_rates.at[2, f'Year {year}'] = float(off_peak_rate)
-            energy_rates.at[3, f'Year {year}'] = float(transmission_loss_factor)
-            energy_rates.at[4, f'Year {year}'] = float(distribution_loss_factor)
-            energy_rates.at[5, f'Year {year}'] = float(net_loss_factor)
-            energy_rates.at[6, f'Year {year}'] = float(peak_energy_adj)
-            energy_rates.at[7, f'Year {year}'] = float(shoulder_energy_adj)
-            energy_rates.at[8, f'Year {year}'] = float(off_peak_energy_adj)
-
-            total_consumption               = st.session_state['calculation_results'].get('total_consumption', 0)
-            load_factor                     = st.session_state['calculation_results'].get('load_factor', 0)
-            peak_consumption_percentage     = st.session_state['calculation_results'].get('peak_consumption', 0)
-            shoulder_consumption_percentage = st.session_state['calculation_results'].get('shoulder_consumption', 0)
-            off_peak_consumption_percentage = st.session_state['calculation_results'].get('off_peak_consumption', 0)
-            peak_demand                     = total_consumption / 8760 / load_factor
-
-            peak_consumption     = total_consumption * (peak_consumption_percentage     / 100)
-            shoulder_consumption = total_consumption * (shoulder_consumption_percentage / 100)
-            off_peak_consumption = total_consumption * (off_peak_consumption_percentage / 100)
-
-            summary_of_consumption.at[0, f'Year {year}'] = total_consumption
-            summary_of_consumption.at[1, f'Year {year}'] = peak_consumption
-            summary_of_consumption.at[2, f'Year {year}'] = shoulder_consumption
-            summary_of_consumption.at[3, f'Year {year}'] = off_peak_consumption
-            summary_of_consumption.at[4, f'Year {year}'] = load_factor
-            summary_of_consumption.at[5, f'Year {year}'] = peak_demand
-
-            peak_volume    = st.session_state['calculation_results'].get('nuos_charge', 0)
-            network_volume = st.session_state['calculation_results'].get('peak_charge', 0)
-            ancillary      = st.session_state['calculation_results'].get('aemo_ancillary_services_charge', 0)
-            participant    = st.session_state['calculation_results'].get('aemo_participant_charge', 0)
-            srec           = st.session_state['calculation_results'].get('srec_charge', 0)
-            lrec           = st.session_state['calculation_results'].get('lrec_charge', 0)
-            service        = st.session_state['calculation_results'].get('service_availability_charge', 0)
-            metering       = st.session_state['calculation_results'].get('metering_charge', 0)
-            retail         = st.session_state['calculation_results'].get('retail_service_charge', 0)
-            admin          = st.session_state['calculation_results'].get('admin_charge', 0)
-
-            other_volume = participant + ancillary + srec + lrec
-            fixed        = service + ((metering + retail + admin) / 30)
-
-            summary_of_charges.at[0, f'Year {year}'] = peak_energy_adj
-            summary_of_charges.at[1, f'Year {year}'] = shoulder_energy_adj
-            summary_of_charges.at[2, f'Year {year}'] = off_peak_energy_adj
-            summary_of_charges.at[3, f'Year {year}'] = peak_volume
-            summary_of_charges.at[4, f'Year {year}'] = network_volume
-            summary_of_charges.at[5, f'Year {year}'] = other_volume
-            summary_of_charges.at[6, f'Year {year}'] = fixed
-
-            peak_energy_costs     = peak_consumption     * (peak_energy_adj     / 100)
-            shoulder_energy_costs = shoulder_consumption * (shoulder_energy_adj / 100)
-            off_peak_energy_costs = off_peak_consumption * (off_peak_energy_adj / 100)
-            peak_demand_costs     = peak_demand * peak_volume * 12
-            network_volume_costs  = total_consumption * (network_volume / 100)
-            other_volume_costs    = total_consumption * (other_volume   / 100)
-            fixed_costs           = fixed * 365
-            total_costs           = (peak_energy_costs + shoulder_energy_costs +
-                                     off_peak_energy_costs + peak_demand_costs +
-                                     network_volume_costs + other_volume_costs + fixed_costs)
-            bundled_cost          = total_costs / total_consumption
-
-            summary_of_costs.at[0, f'Year {year}'] = float(peak_energy_costs)
-            summary_of_costs.at[1, f'Year {year}'] = float(shoulder_energy_costs)
-            summary_of_costs.at[2, f'Year {year}'] = float(off_peak_energy_costs)
-            summary_of_costs.at[3, f'Year {year}'] = float(peak_demand_costs)
-            summary_of_costs.at[4, f'Year {year}'] = float(network_volume_costs)
-            summary_of_costs.at[5, f'Year {year}'] = float(other_volume_costs)
-            summary_of_costs.at[6, f'Year {year}'] = float(fixed_costs)
-            summary_of_costs.at[7, f'Year {year}'] = float(total_costs)
-            summary_of_costs.at[8, f'Year {year}'] = float(total_consumption)
-            summary_of_costs.at[9, f'Year {year}'] = float(bundled_cost)
-
-            energy  = (peak_energy_costs + shoulder_energy_costs + off_peak_energy_costs) / total_consumption
-            network = (peak_demand_costs + network_volume_costs) / total_consumption
-            other   = (other_volume_costs) / total_consumption
-            fixed   = (fixed_costs) / total_consumption
-            total   = (energy + network + other + fixed)
-
-            summary_of_rates.at[0, f'Year {year}'] = float(energy)
-            summary_of_rates.at[1, f'Year {year}'] = float(network)
-            summary_of_rates.at[2, f'Year {year}'] = float(other)
-            summary_of_rates.at[3, f'Year {year}'] = float(fixed)
-            summary_of_rates.at[4, f'Year {year}'] = float(total)
-
-    def calculate_year_4_average(df):
-        for factor in range(len(df)):
-            year_values   = [df.at[factor, f'Year {year}'] for year in range(1, 4)]
-            average_value = sum(year_values) / len(year_values)
-            df.at[factor, 'Average'] = average_value
-
-    calculate_year_4_average(energy_rates)
-    calculate_year_4_average(summary_of_consumption)
-    calculate_year_4_average(summary_of_charges)
-    calculate_year_4_average(summary_of_costs)
-    calculate_year_4_average(summary_of_rates)
-
-    bulk_price = summary_of_rates.at[4, 'Average']
+    # Year N prices off the Nth FY row returned by the scraper (typically FY27,
+    # FY28, FY29); the engine reuses the last row if fewer than 3 are available.
+    with perf.span('pricing.quote'):
+        result = price_all_states(updated_df, fetched_data, inputs)
+
+    energy_rates           = pricing.summary_table(result, 'energy_rates', selected_state)
+    summary_of_consumption = pricing.summary_table(result, 'consumption',  selected_state)
+    summary_of_charges     = pricing.summary_table(result, 'charges',      selected_state)
+    summary_of_costs       = pricing.summary_table(result, 'costs',        selected_state)
+    summary_of_rates       = pricing.summary_table(result, 'rates',        selected_state)
+
+    bulk_price = summary_of_rates.at[pricing.TOTAL_RATE_ROW, 'Average']
 
     return energy_rates, summary_of_consumption, summary_of_charges, summary_of_costs, summary_of_rates, selected_state, bulk_price
 
 
+#########################################################################################################
+#########################################################################################################
+# SCENARIO SWEEP
+#########################################################################################################
+#########################################################################################################
+
+def display_scenario_sweep(fetched_data, inputs, selected_state):
+    """
+    Heatmap of the average bulk price over a grid of two inputs, all other
+    inputs held at their sidebar values. The whole grid, every state, is one
+    batched call to pricing.scenario_sweep.
+    """
+    with st.expander("Scenario Sweep"):
+        keys   = list(pricing.SWEEP_AXES)
+        labels = {key: meta[0] for key, meta in pricing.SWEEP_AXES.items()}
+
+        c1, c2, c3 = st.columns(3)
+        x_key = c1.selectbox("X Axis", keys, index=0, format_func=labels.get, key='sweep_x')
+        y_options = [k for k in keys if k != x_key]
+        y_key = c2.selectbox("Y Axis", y_options, index=len(y_options) - 2, format_func=labels.get, key='sweep_y')
+        steps = c3.slider("Steps per Axis", min_value=5, max_value=101, value=41, key='sweep_steps')
+
+        axes = {}
+        for key in (x_key, y_key):
+            label, low, high, lower, upper = pricing.SWEEP_AXES[key]
+            low, high = st.slider(f"{label} Range", min_value=lower, max_value=upper,
+                                  value=(low, high), key=f'sweep_range_{key}')
+            axes[key] = np.linspace(low, high, steps)
+
+        base = pricing.term_matrix(fetched_data[list(pricing.STATES)])
+        with perf.span('pricing.sweep'):
+            prices = pricing.scenario_sweep(
+                base, inputs, axes,
+                load_escalation=st.session_state['load_factor'],
+                retail_escalation=st.session_state['retail_factor'],
+            )
+
+        with perf.span('plotly.sweep'):
+            import plotly.express as px
+            fig = px.imshow(
+                prices[..., pricing.STATES.index(selected_state)].T,
+                x=axes[x_key], y=axes[y_key], origin='lower', aspect='auto',
+                labels={'x': labels[x_key], 'y': labels[y_key], 'color': '$/kWh'},
+                color_continuous_scale='RdYlGn_r',
+            )
+            fig.update_layout(title=f"Bulk Price ($/kWh), {selected_state}", height=500)
+            st.plotly_chart(fig, use_container_width=True)
+
+        st.download_button(
+            label="Download Sweep (CSV, all states)",
+            data=pricing.sweep_frame(axes, prices).to_csv(index=False),
+            file_name=f"bulk-price-sweep-{x_key}-{y_key}.csv",
+            mime="text/csv",
+        )
+
+
+#########################################################################################################
+#########################################################################################################
+# PRICE RISK SIMULATION
+#########################################################################################################
+#########################################################################################################
+
+def display_price_risk(fetched_data, inputs, selected_state):
+    """
+    Monte Carlo distribution of the bulk price from historical futures
+    volatility (see simulation.py). Runs on demand; the last result is kept
+    in session state against its inputs so other edits don't discard it.
+    """
+    with st.expander("Price Risk Simulation"):
+        c1, c2, c3 = st.columns(3)
+        n_paths  = c1.number_input("Paths", min_value=1000, max_value=1_000_000, value=simulation.DEFAULT_PATHS, step=10000)
+        horizon  = c2.number_input("Horizon (trading days)", min_value=1, max_value=250, value=simulation.DEFAULT_HORIZON_DAYS)
+        lookback = c3.number_input("History (trading days)", min_value=20, max_value=2000, value=simulation.DEFAULT_LOOKBACK, step=10)
+
+        base = pricing.term_matrix(fetched_data[list(pricing.STATES)])
+        key  = (base.tobytes(), tuple(sorted(inputs.items())), n_paths, horizon, lookback,
+                st.session_state['load_factor'], st.session_state['retail_factor'])
+
+        if st.button("Run Simulation"):
+            with perf.span('sqlite.futures_data'):
+                history = data_cache.load_futures_data('futures_prices.db')
+            try:
+                cov = simulation.return_covariance(simulation.curve_returns(history, lookback))
+            except ValueError as e:
+                st.error(f"Cannot estimate volatility: {e}")
+                return
+            with perf.span('pricing.simulation'):
+                prices = simulation.simulate_bulk_prices(
+                    base, inputs, cov, n_paths=n_paths, horizon_days=horizon,
+                    load_escalation=st.session_state['load_factor'],
+                    retail_escalation=st.session_state['retail_factor'],
+                )
+            st.session_state['price_risk'] = (key, prices)
+
+        stored = st.session_state.get('price_risk')
+        if stored is None or stored[0] != key:
+            st.caption("Run the simulation to see P5 / P50 / P95 bulk prices for these inputs.")
+            return
+
+        prices = stored[1]
+        st.table(simulation.price_percentiles(prices).style.format("{:.4f}"))
+
+        # Binned on the server: ship 60 bars, not every path
+        with perf.span('plotly.risk'):
+            import plotly.express as px
+            counts, edges = np.histogram(prices[:, pricing.STATES.index(selected_state)], bins=60)
+            fig = px.bar(
+                x=(edges[:-1] + edges[1:]) / 2, y=counts / counts.sum(),
+                labels={'x': 'Bulk Price ($/kWh)', 'y': 'Probability'},
+            )
+            fig.update_layout(title=f"Simulated Bulk Price, {selected_state} ({len(prices):,} paths)", bargap=0)
+            st.plotly_chart(fig, use_container_width=True)
+
+
 #########################################################################################################
 #########################################################################################################
 # DISPLAY SUMMARY TABLES
@@ -514,83 +414,36 @@ def calculate_bulk_prices():
 
 def display_summary_tables(energy_rates, summary_of_consumption, summary_of_charges, summary_of_costs, summary_of_rates, selected_state):
 
-    def create_table_figure(dataframe, font_size=14, cell_height=25):
-        formats    = []
-        alignments = []
-        for i, col in enumerate(dataframe.columns):
-            if pd.api.types.is_numeric_dtype(dataframe[col]):
-                formats.append(',.2f' if i > 0 else '0')
-                alignments.append('right')
-            else:
-                formats.append('')
-                alignments.append('center' if i == 0 else 'right')
-        total_height = cell_height * (len(dataframe) + 1)
-        fig = go.Figure()
-        fig.add_trace(go.Table(
-            header=dict(values=list(dataframe.columns),
-                        font=dict(size=18, color=['#006FE7'] + ['#006FE7'] * (len(dataframe.columns) - 1)),
-                        fill_color='yellow', height=cell_height,
-                        line=dict(width=1, color='blue'), align='center'),
-            cells=dict(values=dataframe.values.T,
-                       font=dict(size=[16] + [font_size], color=['yellow'] + ['#006FE7'] * (len(dataframe.columns) - 1)),
-                       fill_color=['#006FE7'] + ['white'], height=cell_height,
-                       line=dict(width=1, color='#006FE7'),
-                       format=formats, align=alignments),
-            columnwidth=[font_size] + [font_size / 3] * (len(dataframe.columns) - 1),
-        ))
-        fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), height=total_height)
-        return fig
-
-    def create_rates_figure(dataframe, font_size=14, cell_height=25):
-        formats    = []
-        alignments = []
-        for i, col in enumerate(dataframe.columns):
-            if pd.api.types.is_numeric_dtype(dataframe[col]):
-                formats.append(',.4f' if i > 0 else '0')
-                alignments.append('right')
-            else:
-                formats.append('')
-                alignments.append('center' if i == 0 else 'right')
-        total_height = cell_height * (len(dataframe) + 1)
-        fig = go.Figure()
-        fig.add_trace(go.Table(
-            header=dict(values=list(dataframe.columns),
-                        font=dict(size=18, color=['#006FE7'] + ['#006FE7'] * (len(dataframe.columns) - 1)),
-                        fill_color='yellow', height=cell_height,
-                        line=dict(width=1, color='blue'), align='center'),
-            cells=dict(values=dataframe.values.T,
-                       font=dict(size=[16] + [font_size], color=['yellow'] + ['#006FE7'] * (len(dataframe.columns) - 1)),
-                       fill_color=['#006FE7'] + ['white'], height=cell_height,
-                       line=dict(width=1, color='#006FE7'),
-                       format=formats, align=alignments),
-            columnwidth=[font_size] + [font_size / 3] * (len(dataframe.columns) - 1),
-        ))
-        fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), height=total_height)
-        return fig
-
-    expander_consumption = st.expander("**Energy Consumption**", expanded=True)
-    with expander_consumption:
-        st.plotly_chart(create_table_figure(summary_of_consumption, font_size=16, cell_height=35), use_container_width=True)
-
-    expander_rates = st.expander("**Bulk Electricity Prices**", expanded=False)
-    with expander_rates:
-        st.plotly_chart(create_rates_figure(summary_of_rates, font_size=16, cell_height=35), use_container_width=True)
-
-    expander_costs = st.expander("**Yearly Costs**", expanded=False)
-    with expander_costs:
-        st.plotly_chart(create_table_figure(summary_of_costs, font_size=16, cell_height=35), use_container_width=True)
-
-    expander_tariffs = st.expander("**Tariffs & Factors**", expanded=False)
-    with expander_tariffs:
-        st.plotly_chart(create_rates_figure(energy_rates, font_size=16, cell_height=35), use_container_width=True)
-
-    expander_charges = st.expander("**Charges**", expanded=False)
-    with expander_charges:
-        st.plotly_chart(create_rates_figure(summary_of_charges, font_size=16, cell_height=35), use_container_width=True)
+    # Only open sections are rendered; their markup is cached on the table contents
+    renderer = st.radio("Table Style", table_render.RENDERERS, horizontal=True, key='table_renderer')
+
+    sections = [
+        ("**Energy Consumption**",      summary_of_consumption, 2, True),
+        ("**Bulk Electricity Prices**", summary_of_rates,       4, False),
+        ("**Yearly Costs**",            summary_of_costs,       2, False),
+        ("**Tariffs & Factors**",       energy_rates,           4, False),
+        ("**Charges**",                 summary_of_charges,     4, False),
+    ]
+    for label, dataframe, decimals, expanded in sections:
+        if table_render.lazy_section(label, key=f'section_{label.strip("*")}', expanded=expanded):
+            with perf.span('render.summary_table'):
+                table_render.render_table(dataframe, decimals, renderer, font_size=16, cell_height=35)
 
     return
 
 
+#########################################################################################################
+#########################################################################################################
+# EXCEL EXPORT
+#########################################################################################################
+#########################################################################################################
+
+# Keyed on excel_export.sheets_key(); the sheets themselves are not hashed again
+@st.cache_data(max_entries=16, show_spinner="Preparing workbook...")
+def build_excel_export(export_key, _sheets):
+    return excel_export.write_workbook(_sheets)
+
+
 #########################################################################################################
 #########################################################################################################
 # DATABASE FUNCTIONS
@@ -605,23 +458,13 @@ def create_connection(db_file):
         st.error(f"Error connecting to database {db_file}: {e}")
     return conn
 
-def create_futures_table_if_not_exists(db_file, table_name):
+def create_futures_table_if_not_exists(db_file, table_name='futures_data'):
+    # futures_data is a view over futures_curve; ensure_schema creates both
+    # and migrates databases still holding the old wide table
     conn = create_connection(db_file)
     if conn is not None:
-        create_table_query = f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                `Quote Date` DATE,
-                `Year` INTEGER,
-                `NSW` REAL,
-                `VIC` REAL,
-                `QLD` REAL,
-                `SA` REAL,
-                PRIMARY KEY (`Quote Date`, `Year`)
-            );
-        """
         try:
-            conn.execute(create_table_query)
-            conn.commit()
+            futures_db.ensure_schema(conn)
         except sqlite3.Error as e:
             st.error(f"Error creating table: {e}")
         finally:
@@ -637,22 +480,19 @@ def save_to_sql_database(df, db_file, table_name='futures_data'):
     create_futures_table_if_not_exists(db_file, table_name)
     conn = create_connection(db_file)
     if conn is not None:
-        cursor        = conn.cursor()
-        data_appended = False
-        for index, row in df.iterrows():
-            quote_date = row['Quote Date']
-            year       = row['Year']
-            query      = f"SELECT COUNT(*) FROM {table_name} WHERE `Quote Date` = ? AND `Year` = ?"
-            cursor.execute(query, (quote_date, year))
-            exists = cursor.fetchone()[0]
-            if exists == 0:
-                row.to_frame().T.to_sql(table_name, conn, if_exists='append', index=False)
-                data_appended = True
-        conn.close()
-        if data_appended:
-            st.sidebar.success("New futures data appended to database successfully.")
+        try:
+            with perf.span('sqlite.save_curve'):
+                added = futures_db.upsert_futures_rows(conn, df)
+            inserted, skipped = added.sum(), (~added).sum()
+        except sqlite3.Error as e:
+            st.error(f"Error saving futures data to database: {e}")
+            return
+        finally:
+            conn.close()
+        if inserted:
+            st.sidebar.success(f"{inserted} new futures rows appended to database successfully.")
         else:
-            st.sidebar.info("No new futures data was appended to the database (all data already exists).")
+            st.sidebar.info(f"No new futures data was appended to the database (all {skipped} rows already exist).")
     else:
         st.error("Connection to database failed.")
 
@@ -681,7 +521,8 @@ def save_bulk_prices_db(bulk_price_index_df, db_file, table_name='bulk_price_ind
     conn = create_connection(db_file)
     if conn is not None:
         try:
-            bulk_price_index_df.to_sql(table_name, conn, if_exists='append', index=False, method="multi")
+            with perf.span('sqlite.save_index'):
+                bulk_price_index_df.to_sql(table_name, conn, if_exists='append', index=False, method="multi")
             st.success("Bulk Price Index data saved to database successfully.")
         except Exception as e:
             st.error(f"Error saving data to database: {e}")
@@ -697,6 +538,9 @@ def save_bulk_prices_db(bulk_price_index_df, db_file, table_name='bulk_price_ind
 #########################################################################################################
 #########################################################################################################
 
+# Per-rerun timing spans: logged as JSON, shown in the sidebar with ?debug=perf
+perf.start_run('HUM.py')
+
 st.set_page_config(
     page_title='HUMQuote - Bulk Electricity Pricing',
     page_icon='⚡',
@@ -737,7 +581,7 @@ if 'last_trading_day' not in st.session_state:
 st.sidebar.header("Latest ASX Futures Data")
 
 if st.sidebar.button('Fetch Data'):
-    fetched_data = scrape_and_save()
+    fetched_data, fetch_source = scrape_and_save()
 
     # scrape_and_save() returns an empty DataFrame only on a genuine error.
     # Weekend fetches now return valid data labelled with the last trading day.
@@ -745,10 +589,14 @@ if st.sidebar.button('Fetch Data'):
         st.session_state['fetched_data'] = fetched_data.set_index('Quote Date')
         st.session_state['data_fetched'] = True
 
-        # DB write uses the derived last-trading-day date on weekends.
-        # The PRIMARY KEY constraint silently skips rows that already exist,
-        # so there is no duplication risk if Friday's Action already ran.
-        save_to_sql_database(fetched_data, 'futures_prices.db')
+        # Only the session that actually hit ASX writes; cached and database
+        # curves are already stored. DB write uses the derived
+        # last-trading-day date on weekends, and the PRIMARY KEY constraint
+        # silently skips rows that already exist.
+        if fetch_source == 'asx':
+            save_to_sql_database(fetched_data, 'futures_prices.db')
+        elif fetch_source == 'database':
+            st.sidebar.info("Today's curve is already in the database — served from there.")
 
         if 'bulk_price_index_df' in st.session_state and not st.session_state['bulk_price_index_df'].empty:
             save_bulk_prices_db(
@@ -759,6 +607,32 @@ if st.sidebar.button('Fetch Data'):
 
         update_escalated_data(st.session_state['load_factor'], st.session_state['retail_factor'])
 
+# ── Sidebar: as-of-date quotes ─────────────────────────────────────────────────
+# Re-issue or audit an old quote against the curve stored for any past trading
+# day. An indexed lookup in futures_prices.db, no scrape and no network.
+with perf.span('sqlite.quote_date_range'):
+    first_quote_day, last_quote_day = data_cache.quote_date_range('futures_prices.db')
+if last_quote_day is not None:
+    with st.sidebar.expander("Historical Quote"):
+        as_of_date = st.date_input(
+            "Quote Date", value=last_quote_day,
+            min_value=first_quote_day, max_value=last_quote_day, key='as_of_date'
+        )
+        if st.button('Load Curve'):
+            with perf.span('sqlite.load_curve'):
+                curve = data_cache.load_curve('futures_prices.db', as_of_date)
+            if curve.empty:
+                st.warning(f"No futures curve stored on or before {as_of_date}.")
+            else:
+                curve = curve.copy()
+                curve.index = pd.Index(pd.to_datetime(curve.index).date, name='Quote Date')
+                st.session_state['fetched_data']       = curve
+                st.session_state['data_fetched']       = True
+                st.session_state['is_weekend_display'] = False
+                st.session_state['last_trading_day']   = curve.index[0]
+                if curve.index[0] != as_of_date:
+                    st.info(f"No curve stored for {as_of_date}; using the last trading day before it, {curve.index[0]}.")
+
 # Display formatted fetched data in the sidebar
 if not st.session_state['fetched_data'].empty:
     formatted_sidebar_df = format_data(st.session_state['fetched_data'].copy())
@@ -784,7 +658,12 @@ if not st.session_state['updated_df'].empty:
 
     update_escalated_data(st.session_state['load_factor'], st.session_state['retail_factor'])
 
-    calculate_bulk_prices()
+    (energy_rates, summary_of_consumption, summary_of_charges,
+     summary_of_costs, summary_of_rates, selected_state, bulk_price) = calculate_bulk_prices(
+        st.session_state['updated_df'],
+        st.session_state['fetched_data'],
+        st.session_state['calculation_results'],
+    )
 
     c1, c2 = st.columns(2)
 
@@ -829,25 +708,46 @@ if not st.session_state['updated_df'].empty:
         off_peak_df = format_data(off_peak_df)
         st.table(off_peak_df)
 
+    display_scenario_sweep(
+        st.session_state['fetched_data'],
+        st.session_state['calculation_results'],
+        selected_state,
+    )
+
+    display_price_risk(
+        st.session_state['fetched_data'],
+        st.session_state['calculation_results'],
+        selected_state,
+    )
+
     st.write("## Export to Excel")
 
-    peak_df      = format_data(st.session_state['updated_df'].copy())
-    excel_buffer = BytesIO()
-
-    with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-        summary_of_rates.to_excel(writer,       sheet_name='Bulk Prices',   index=False)
-        summary_of_consumption.to_excel(writer,  sheet_name='Consumption',   index=False)
-        summary_of_costs.to_excel(writer,        sheet_name='Yearly Costs',  index=False)
-        energy_rates.to_excel(writer,            sheet_name='Energy Rates',  index=False)
-        summary_of_charges.to_excel(writer,      sheet_name='Charges',       index=False)
-        peak_df.to_excel(writer,                 sheet_name='Peak Prices',   index=True)
-        off_peak_df.to_excel(writer,             sheet_name='Off-Peak Prices', index=True)
-
-    excel_buffer.seek(0)
-
-    st.download_button(
-        label="📥 Download Excel",
-        data=excel_buffer,
-        file_name=f"bulk-electricity-pricing-{selected_state}-{st.session_state['fetched_data'].index[0]}.xlsx",
-        mime="application/vnd.ms-excel"
-    )
\ No newline at end of file
+    peak_df = format_data(st.session_state['updated_df'].copy())
+    sheets  = [
+        ('Bulk Prices',     summary_of_rates,       False),
+        ('Consumption',     summary_of_consumption, False),
+        ('Yearly Costs',    summary_of_costs,       False),
+        ('Energy Rates',    energy_rates,           False),
+        ('Charges',         summary_of_charges,     False),
+        ('Peak Prices',     peak_df,                True),
+        ('Off-Peak Prices', off_peak_df,            True),
+    ]
+
+    # The workbook is only built on request, then reused until an input or the curve changes
+    with perf.span('excel.key'):
+        export_key = excel_export.sheets_key(sheets)
+    if st.button("📄 Prepare Excel"):
+        st.session_state['excel_export_key'] = export_key
+
+    if st.session_state.get('excel_export_key') == export_key:
+        with perf.span('excel.build'):
+            workbook = build_excel_export(export_key, sheets)
+        st.download_button(
+            label="📥 Download Excel",
+            data=workbook,
+            file_name=f"bulk-electricity-pricing-{selected_state}-{st.session_state['fetched_data'].index[0]}.xlsx",
+            mime="application/vnd.ms-excel"
+        )
+
+perf.finish_run()
+perf.debug_panel()
\ No newline at end of file
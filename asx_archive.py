@@ -0,0 +1,254 @@
+"""
+ASX Page Archive
+================
+Conditional fetching plus a compressed, content-addressed archive of every
+distinct ASX page the scrapers have seen:
+
+    archive/asx/2026/2026-08-21/<fetched>-<sha256>.html.gz   one file per distinct body
+    archive/asx/fetch_state.<caller>.json                    validators per URL, per caller
+
+fetch_snapshot() sends If-None-Match / If-Modified-Since from the caller's
+last recorded response. A 304, or a 200 whose SHA-256 matches the last
+recorded body, comes back with changed=False so the caller can skip parsing
+altogether. Each caller (the daily job, the HUM.py Fetch button) keeps its
+own state, so a fetch by one never hides a new page from the other, and the
+state is only written by record_fetch() once the caller has stored what it
+parsed; a failed parse or database write is retried on the next run. A new
+body is
+gzipped into the archive under the market date shown on the page (read with
+asx_scraper.peek_market_date, no soup needed). Files are written atomically
+with a fixed gzip mtime, so the same content always produces the same bytes
+and re-archiving is a no-op. The UTC fetch time at the front of the name
+orders a market date's bodies by when they were seen; a body seen again
+after a different one is renamed to the new time, so the last file of a
+date is always the page the site showed last.
+
+`update_db.py replay` re-parses the whole archive into the database in
+parallel; single pages can be re-imported with `update_db.py import`.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional
+
+import asx_fetch
+from asx_scraper import ASX_URL, peek_market_date
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+ARCHIVE_DIR = os.path.join('archive', 'asx')
+STATE_FILE  = 'fetch_state.{caller}.json'
+
+DEFAULT_CALLER = 'update_db'
+
+# Directory for pages whose market date cannot be read
+UNDATED = 'undated'
+
+# UTC fetch time prefixed to archived file names; sorts as text
+FETCHED_FORMAT = '%Y%m%dT%H%M%SZ'
+
+
+class Snapshot(NamedTuple):
+    content:     bytes
+    digest:      str            # SHA-256 of content
+    market_date: Optional[str]  # YYYY-MM-DD shown on the page
+    path:        Optional[str]  # archive file holding content
+    changed:     bool           # False on 304 or an identical body
+    validators:  Optional[dict] = None  # state entry for record_fetch(); None on 304
+
+
+# ── Archive ────────────────────────────────────────────────────────────────────
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def archive_folder(market_date: Optional[str], archive_dir: str = ARCHIVE_DIR) -> str:
+    return os.path.join(archive_dir, *((market_date[:4], market_date) if market_date else (UNDATED,)))
+
+
+def archive_path(
+    digest: str,
+    market_date: Optional[str],
+    archive_dir: str = ARCHIVE_DIR,
+    fetched: Optional[datetime] = None,
+) -> str:
+    stamp = (fetched or datetime.now(timezone.utc)).strftime(FETCHED_FORMAT)
+    return os.path.join(archive_folder(market_date, archive_dir), f'{stamp}-{digest}.html.gz')
+
+
+def _fetch_order(name: str) -> tuple:
+    # Files archived before names carried a fetch time sort first
+    return ('-' in name, name)
+
+
+def _archived_names(folder: str) -> list:
+    try:
+        names = [name for name in os.listdir(folder) if name.endswith('.html.gz')]
+    except FileNotFoundError:
+        return []
+    return sorted(names, key=_fetch_order)
+
+
+def store(
+    content: bytes,
+    market_date: Optional[str] = None,
+    archive_dir: str = ARCHIVE_DIR,
+    fetched: Optional[datetime] = None,
+) -> tuple:
+    """
+    Writes content to the archive as the latest body fetched for its market
+    date. An identical body already stored is reused, and renamed to the new
+    fetch time when a different body was archived after it. Returns
+    (path, created).
+    """
+    digest = content_hash(content)
+    folder = archive_folder(market_date, archive_dir)
+    path   = archive_path(digest, market_date, archive_dir, fetched)
+
+    names = _archived_names(folder)
+    same  = [name for name in names if name.endswith(f'{digest}.html.gz')]
+    if same:
+        if names[-1] == same[-1]:
+            return os.path.join(folder, same[-1]), False
+        os.replace(os.path.join(folder, same[-1]), path)
+        return path, False
+
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        # mtime=0 keeps the compressed bytes identical for identical content
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(content)
+    os.replace(tmp_path, path)
+    return path, True
+
+
+def read(path: str) -> bytes:
+    with gzip.open(path, 'rb') as f:
+        return f.read()
+
+
+def iter_archive(archive_dir: str = ARCHIVE_DIR) -> list:
+    """
+    Every archived page under archive_dir, oldest market date first and each
+    date's pages in the order they were fetched.
+    """
+    paths = []
+    for root, _dirs, files in os.walk(archive_dir):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith('.html.gz'))
+    return sorted(paths, key=lambda path: (os.path.dirname(path), _fetch_order(os.path.basename(path))))
+
+
+# ── Fetch state ────────────────────────────────────────────────────────────────
+
+def state_path(caller: str = DEFAULT_CALLER, archive_dir: str = ARCHIVE_DIR) -> str:
+    return os.path.join(archive_dir, STATE_FILE.format(caller=caller))
+
+
+def load_state(archive_dir: str = ARCHIVE_DIR, caller: str = DEFAULT_CALLER) -> dict:
+    try:
+        with open(state_path(caller, archive_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: dict, archive_dir: str = ARCHIVE_DIR, caller: str = DEFAULT_CALLER):
+    os.makedirs(archive_dir, exist_ok=True)
+    path = state_path(caller, archive_dir)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(f'{path}.tmp', path)
+
+
+def conditional_headers(entry: dict) -> dict:
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+# ── Conditional fetch ──────────────────────────────────────────────────────────
+
+def fetch_snapshot(
+    url: str = ASX_URL,
+    archive_dir: str = ARCHIVE_DIR,
+    warn: Optional[Callable[[str], None]] = None,
+    caller: str = DEFAULT_CALLER,
+    **fetch_kwargs,
+) -> Optional[Snapshot]:
+    """
+    Conditionally fetches url with caller's validators and archives the body
+    when it is new. Nothing is recorded until record_fetch() is called.
+
+    Returns None when the page could not be fetched. On 304 the previous body
+    is read back from the archive, so content is always the current page.
+    """
+    entry = load_state(archive_dir, caller).get(url, {})
+    previous_path = entry.get('path')
+    if previous_path and not os.path.exists(previous_path):
+        # Archive was pruned; validators alone can't give the body back
+        entry, previous_path = {}, None
+
+    response = asx_fetch.run(asx_fetch.fetch(url, headers=conditional_headers(entry), warn=warn, **fetch_kwargs))
+    if response is None:
+        return None
+
+    if response.status_code == 304:
+        return Snapshot(read(previous_path), entry['sha256'], entry.get('market_date'), previous_path, False)
+
+    content = response.content
+    digest  = content_hash(content)
+    changed = digest != entry.get('sha256')
+
+    market_date = peek_market_date(content)
+    market_date = market_date.isoformat() if market_date else None
+
+    # A read-only or full disk costs the archive, not the fetch
+    path, validators = None, None
+    try:
+        fetched = datetime.now(timezone.utc)
+        path, _created = store(content, market_date, archive_dir, fetched)
+        validators = {
+            'etag':          response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256':        digest,
+            'market_date':   market_date,
+            'path':          path,
+            'fetched_at':    datetime.now().isoformat(timespec='seconds'),
+        }
+    except OSError as e:
+        if warn:
+            warn(f"Could not archive ASX page: {e}")
+    return Snapshot(content, digest, market_date, path, changed, validators)
+
+
+def record_fetch(
+    url: str,
+    page: Snapshot,
+    archive_dir: str = ARCHIVE_DIR,
+    caller: str = DEFAULT_CALLER,
+    warn: Optional[Callable[[str], None]] = None,
+):
+    """
+    Saves page's validators as caller's state for url, so the next
+    fetch_snapshot() can come back unchanged. Call it only after whatever was
+    parsed from the page has been stored.
+    """
+    if page.validators is None:
+        return
+    try:
+        state = load_state(archive_dir, caller)
+        state[url] = page.validators
+        save_state(state, archive_dir, caller)
+    except OSError as e:
+        if warn:
+            warn(f"Could not save ASX fetch state: {e}")
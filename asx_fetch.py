@@ -0,0 +1,154 @@
+"""
+ASX Energy Fetcher
+==================
+Non-blocking HTTP layer shared by update_db.py and the HUM.py Fetch button.
+
+    fetch(url)          coroutine → requests.Response, or None on failure
+    run(coro)           runs it from synchronous code
+
+Every request goes through one pooled requests.Session (keep-alive, so
+repeat fetches skip the TCP / TLS handshake) and runs on a shared worker
+thread pool under asyncio, so no extra dependency is needed. Each attempt has its own
+connect / read timeout, connection errors and 429 / 5xx responses are retried
+with full-jitter exponential backoff, and the whole call, retries included,
+is capped by a hard latency budget. A slow ASX response can therefore hold
+up the caller for at most `budget` seconds.
+
+Set ASX_BASE_URL (see asx_scraper) to point every fetch at the local stand-in
+server in asx_standin.py.
+"""
+
+import asyncio
+import functools
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from asx_scraper import ASX_URL, REQUEST_HEADERS
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+# Per-attempt (connect, read) timeout in seconds
+ATTEMPT_TIMEOUT = (5, 10)
+
+# Retries after the first attempt, and the cap on the whole call (seconds)
+MAX_RETRIES    = 3
+LATENCY_BUDGET = 20.0
+
+# Backoff before retry n (1, 2, ...) is uniform in [0, BACKOFF_BASE * 2**(n-1)) seconds
+BACKOFF_BASE = 0.5
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+POOL_SIZE = 8
+
+
+# ── Session pool ───────────────────────────────────────────────────────────────
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Blocking GETs run here rather than in the event loop's default executor, so
+# a call that hits its latency budget returns at once instead of waiting in
+# asyncio.run() for the abandoned request to finish
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='asx-fetch')
+
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session; requests.Session is safe to share across threads for GETs."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update(REQUEST_HEADERS)
+            _session = session
+        return _session
+
+
+# ── Async fetch ────────────────────────────────────────────────────────────────
+
+async def _fetch_with_retries(
+    session: requests.Session,
+    url: str,
+    headers: Optional[dict],
+    retries: int,
+    timeout,
+    warn: Optional[Callable[[str], None]],
+) -> Optional[requests.Response]:
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(random.uniform(0, BACKOFF_BASE * 2 ** (attempt - 1)))
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(
+                _executor, functools.partial(session.get, url, headers=headers, timeout=timeout)
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if warn:
+                warn(f"Attempt {attempt + 1} failed for {url}: {e}")
+            continue
+
+        if response.status_code in RETRY_STATUSES:
+            if warn:
+                warn(f"Attempt {attempt + 1} for {url} returned HTTP {response.status_code}")
+            continue
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            # 4xx other than 429 will not get better on retry
+            if warn:
+                warn(f"HTTP error: {e}")
+            return None
+        return response
+
+    if warn:
+        warn(f"Giving up on {url} after {retries + 1} attempts")
+    return None
+
+
+async def fetch(
+    url: str = ASX_URL,
+    headers: Optional[dict] = None,
+    retries: int = MAX_RETRIES,
+    timeout=ATTEMPT_TIMEOUT,
+    budget: float = LATENCY_BUDGET,
+    warn: Optional[Callable[[str], None]] = None,
+    session: Optional[requests.Session] = None,
+) -> Optional[requests.Response]:
+    """
+    GETs url with retries inside an overall latency budget. Returns the
+    response (status < 400; a 304 is returned as-is), or None when every
+    attempt failed or the budget ran out. headers are merged over the
+    session's default headers.
+    """
+    session = session or get_session()
+    try:
+        return await asyncio.wait_for(
+            _fetch_with_retries(session, url, headers, retries, timeout, warn), budget
+        )
+    except asyncio.TimeoutError:
+        if warn:
+            warn(f"Timed out after {budget:g}s fetching {url}")
+        return None
+
+
+# ── Blocking wrapper ───────────────────────────────────────────────────────────
+
+def run(coro):
+    """Runs a fetch coroutine to completion from synchronous code."""
+    # Streamlit script threads and the CLI have no running loop, so
+    # asyncio.run is enough; inside a running loop, use a helper thread
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
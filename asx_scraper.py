@@ -0,0 +1,288 @@
+"""
+ASX Energy Page Extractor
+=========================
+Streamlit-free parsing of https://www.asxenergy.com.au/futures/au_electricity,
+shared by update_db.py and the HUM.py Fetch button.
+
+The page is parsed once and every contract table is indexed in a single
+document-order pass, grouped by contract card:
+
+    <div class="... shadow-md ...">                  one card per contract
+        <button class="contract-btn" data-code="HN">  product + region code
+        <div class="data-table-container"><table>…    Period | Bid | Ask | Last | +/- | Vol | Settle
+
+Adding more products or regions costs one dictionary lookup each rather than
+another walk of the DOM, and extract_contract_rows() returns every product,
+region and period on the page in long format from the same index. The lxml
+parser is used when it is installed (the GitHub Action installs it) and
+html.parser otherwise.
+
+bs4 (and lxml) are only imported by make_soup(), so the pages that just need
+the market calendar do not pay for them at startup.
+"""
+
+import os
+import re
+from datetime import date, datetime, timedelta
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+# Override with e.g. ASX_BASE_URL=http://127.0.0.1:8765 to use asx_standin.py
+ASX_BASE_URL = os.environ.get('ASX_BASE_URL', 'https://www.asxenergy.com.au').rstrip('/')
+ASX_URL      = f'{ASX_BASE_URL}/futures/au_electricity'
+
+# H = Base Strip product; suffix = state code
+BASE_STRIP_CODES = {
+    'HN': 'NSW',
+    'HV': 'VIC',
+    'HQ': 'QLD',
+    'HS': 'SA',
+}
+
+REQUEST_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+    )
+}
+
+# Second character of a data-code; the first is the product (H = Base Strip)
+REGION_CODES = {
+    'N': 'NSW',
+    'V': 'VIC',
+    'Q': 'QLD',
+    'S': 'SA',
+}
+
+# Table columns: Period | Bid | Ask | Last | +/- | Vol | Settle
+SETTLE_COLUMN = 6
+
+# Long-format fields produced by extract_contract_rows(), after Quote Date
+CONTRACT_FIELDS = ['product', 'region', 'period', 'contract',
+                   'bid', 'ask', 'last', 'change', 'volume', 'settle']
+
+# Calendar the ASX market date follows
+MARKET_TIMEZONE = 'Australia/Sydney'
+
+HTML_PARSER = 'lxml' if find_spec('lxml') else 'html.parser'
+
+
+# ── Market calendar ────────────────────────────────────────────────────────────
+
+def market_today() -> date:
+    """Today's date in Sydney (falls back to local time without tz data)."""
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo(MARKET_TIMEZONE)).date()
+    except Exception:
+        return date.today()
+
+
+def last_trading_day(day: date) -> date:
+    """Saturday / Sunday → the preceding Friday; weekdays unchanged."""
+    return day - timedelta(days=max(0, day.weekday() - 4))
+
+
+# ── Parsing ────────────────────────────────────────────────────────────────────
+
+def make_soup(content) -> 'BeautifulSoup':
+    """Parses a page body (bytes or str) with the fastest available parser."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, HTML_PARSER)
+
+
+def _parse_market_date_text(text: str) -> Optional[date]:
+    # Strip non-breaking spaces (raw or as an entity) and grab the first line only
+    first_line = text.replace('&nbsp;', '').replace('\xa0', '').strip().split('\n')[0].strip()
+    try:
+        return datetime.strptime(first_line, '%a %d %b %Y').date()
+    except ValueError:
+        return None
+
+
+def parse_market_date(soup: 'BeautifulSoup') -> Optional[date]:
+    """
+    Reads the calendar date shown in the #refresh-container-market_date
+    widget, whose <pre> tag contains text like: "\\xa0Sat 20 Jun 2026\\n\\xa0Weekend\\n"
+
+    Returns None when the element is missing or cannot be parsed. Weekend
+    handling is left to the caller.
+    """
+    container = soup.find(id='refresh-container-market_date')
+    pre = container.find('pre') if container else None
+    if not pre:
+        return None
+    return _parse_market_date_text(pre.get_text())
+
+
+_MARKET_DATE_RE = re.compile(
+    rb'id=["\']refresh-container-market_date["\'].*?<pre[^>]*>(.*?)</pre>', re.DOTALL
+)
+
+
+def peek_market_date(content: bytes) -> Optional[date]:
+    """
+    Same as parse_market_date() but reads the raw page bytes with a regular
+    expression, for callers that need the date without building a soup
+    (archiving, change detection).
+    """
+    match = _MARKET_DATE_RE.search(content)
+    if not match:
+        return None
+    return _parse_market_date_text(match.group(1).decode('utf-8', 'replace'))
+
+
+def index_contract_tables(soup: 'BeautifulSoup', warn: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Maps every contract-btn data-code on the page to its data table in one
+    pass over the document.
+
+    Buttons and tables are grouped by the shadow-md card that encloses them,
+    so a card's buttons are only ever paired with the table inside that same
+    card. A card without a table is skipped; warn, when given, receives a
+    message naming its codes.
+
+    Returns: {'HN': <table>, 'HV': <table>, ...}
+    """
+    cards = {}   # id(card) → [codes, table], in document order
+    for el in soup.select('button.contract-btn[data-code], div.data-table-container table'):
+        card = el.find_parent('div', class_='shadow-md')
+        if card is None:
+            continue
+        entry = cards.setdefault(id(card), [[], None])
+        if el.name == 'button':
+            entry[0].append(el['data-code'])
+        elif entry[1] is None:
+            entry[1] = el
+
+    tables = {}
+    for codes, table in cards.values():
+        if not codes:
+            continue
+        if table is None:
+            if warn:
+                warn(f"No data table in the contract card for {', '.join(codes)} — skipped")
+            continue
+        for code in codes:
+            tables.setdefault(code, table)
+    return tables
+
+
+def table_rows(table, with_titles: bool = False) -> list:
+    """
+    Text of every 7+ column body row: [[period, bid, ask, last, +/-, vol, settle], ...].
+    With with_titles, the period cell's title attribute (the full contract
+    code, e.g. "HNM2027") is appended to each row.
+    """
+    body = table.find('tbody') or table
+    rows = []
+    for tr in body.find_all('tr'):
+        cells = tr.find_all('td')
+        if len(cells) > SETTLE_COLUMN:
+            row = [c.get_text(strip=True) for c in cells]
+            if with_titles:
+                row.append(cells[0].get('title', ''))
+            rows.append(row)
+    return rows
+
+
+def _number(text: str) -> Optional[float]:
+    # ASX shows '-' for no trade / no quote
+    try:
+        return float(text.replace(',', ''))
+    except ValueError:
+        return None
+
+
+def extract_fy_prices(table, state: str = '', warn: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Financial Year (FY) settle prices from one contract table, keyed by
+    integer year. Rows are labelled "FY27", "FY28", ... and CY or other
+    periods are skipped. warn, when given, receives a message for every row
+    that cannot be used.
+
+    Returns: {2027: 83.24, 2028: 84.73, 2029: 92.91, ...}
+    """
+    prices = {}
+    for cells in table_rows(table):
+        label = cells[0]
+        if not label.startswith('FY'):
+            continue
+
+        try:
+            year = int('20' + label[2:])         # FY27 → 2027, FY28 → 2028, FY29 → 2029
+        except (ValueError, IndexError):
+            if warn:
+                warn(f"Could not parse year from label '{label}'")
+            continue
+
+        settle_text = cells[SETTLE_COLUMN]
+        if settle_text == '-' or not settle_text:
+            if warn:
+                warn(f"No settle price for {state} {label} — skipping")
+            continue
+
+        try:
+            prices[year] = round(float(settle_text), 2)
+        except ValueError:
+            if warn:
+                warn(f"Could not parse price '{settle_text}' for {state} {label}")
+    return prices
+
+
+def extract_base_strip_prices(tables: dict, warn: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    FY Base Strip settles for every state from an index_contract_tables()
+    result.
+
+    Returns: {2027: {'NSW': 80.29, 'VIC': 57.43, ...}, 2028: {...}, ...}
+    """
+    prices_by_year: dict = {}
+    for code, state in BASE_STRIP_CODES.items():
+        table = tables.get(code)
+        if table is None:
+            if warn:
+                warn(f"No contract table found for data-code='{code}' ({state})")
+            continue
+        for year, price in extract_fy_prices(table, state, warn).items():
+            prices_by_year.setdefault(year, {})[state] = price
+    return prices_by_year
+
+
+def split_data_code(code: str) -> tuple:
+    """'HN' → ('H', 'NSW'); unknown region letters are kept as-is."""
+    return code[:-1], REGION_CODES.get(code[-1], code[-1])
+
+
+def extract_contract_rows(tables: dict) -> list:
+    """
+    Every row of every contract table on the page in long format, one dict
+    per (product, region, period) with the fields in CONTRACT_FIELDS.
+    Prices and volume are None where the page shows '-'.
+    """
+    rows = []
+    for code, table in tables.items():
+        product, region = split_data_code(code)
+        for period, bid, ask, last, change, vol, settle, *rest, title in table_rows(table, with_titles=True):
+            if not period:
+                continue
+            volume = _number(vol)
+            rows.append({
+                'product':  product,
+                'region':   region,
+                'period':   period,
+                'contract': title or None,
+                'bid':      _number(bid),
+                'ask':      _number(ask),
+                'last':     _number(last),
+                'change':   _number(change),
+                'volume':   None if volume is None else int(volume),
+                'settle':   _number(settle),
+            })
+    return rows
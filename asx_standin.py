@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Local ASX Energy Stand-in
+=========================
+Serves recorded ASX pages over HTTP so the fetch / parse path can be run and
+benchmarked offline:
+
+    python asx_standin.py                           serves fixtures/asx on :8765
+    ASX_BASE_URL=http://127.0.0.1:8765 python update_db.py
+
+Every <name>.html file in the page directory is served at /futures/<name>,
+gzip-compressed when the client accepts it, with an ETag and Last-Modified
+header; a matching If-None-Match gets a 304. Fault injection for exercising
+the retries and latency budget in asx_fetch:
+
+    --delay SECONDS     sleep before every response
+    --fail-first N      answer the first N requests with HTTP 503
+
+The pages under fixtures/asx are synthetic recordings in the current ASX
+layout, built from futures_prices.db (weekday page for Fri 21 Aug 2026, a
+weekend page in weekend/, and in missing_table/ the weekday page with an
+extra contract card that has no data table).
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+FIXTURE_DIR  = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'asx')
+DEFAULT_PORT = 8765
+
+
+# ── Server ─────────────────────────────────────────────────────────────────────
+
+class StandinHandler(BaseHTTPRequestHandler):
+    page_dir   = FIXTURE_DIR
+    delay      = 0.0
+    fail_first = 0
+    requests_seen = 0
+    _count_lock   = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls._count_lock:
+            cls.requests_seen += 1
+            n = cls.requests_seen
+
+        if cls.delay:
+            time.sleep(cls.delay)
+        if n <= cls.fail_first:
+            self.send_error(503, 'Injected failure')
+            return
+
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if not path.startswith('/futures/'):
+            self.send_error(404)
+            return
+        name = os.path.basename(path)
+        file_path = os.path.join(cls.page_dir, f'{name}.html')
+        if not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+
+        with open(file_path, 'rb') as f:
+            body = f.read()
+        etag          = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        last_modified = formatdate(os.path.getmtime(file_path), usegmt=True)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(page_dir: str = FIXTURE_DIR, port: int = 0, delay: float = 0.0, fail_first: int = 0) -> ThreadingHTTPServer:
+    """
+    Starts the stand-in on a daemon thread and returns the server; the bound
+    port is server.server_address[1] (port 0 picks a free one). Call
+    server.shutdown() when done.
+    """
+    handler = type('Handler', (StandinHandler,), {
+        'page_dir':      page_dir,
+        'delay':         delay,
+        'fail_first':    fail_first,
+        'requests_seen': 0,
+        '_count_lock':   threading.Lock(),
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve recorded ASX pages locally')
+    parser.add_argument('--dir', default=FIXTURE_DIR, help='directory of <name>.html pages')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to sleep before each response')
+    parser.add_argument('--fail-first', type=int, default=0, help='answer the first N requests with 503')
+    args = parser.parse_args(argv)
+
+    server = serve(args.dir, args.port, args.delay, args.fail_first)
+    print(f"✓ Serving {args.dir} at http://127.0.0.1:{server.server_address[1]}/futures/<name>")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
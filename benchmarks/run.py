@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+HUMQuote Benchmarks
+===================
+Offline timings of the quote hot paths, on the recorded ASX pages in
+fixtures/asx and a copy of the shipped futures_prices.db:
+
+    python benchmarks/run.py                    every case at 1×, 10× and 100×
+    python benchmarks/run.py --scales 1 10      smaller sizes only
+    python benchmarks/run.py -k excel           cases whose name contains "excel"
+    python benchmarks/run.py --check            exit 1 on a regression
+    python benchmarks/run.py --update           store the results as baselines
+
+Cases:
+
+    parse.extract_fy_prices_for_state   the four Base Strip tables of one soup
+    parse.snapshot                      a whole page, soup included (both fixtures)
+    pricing.quote                       calculate_bulk_prices for one quote
+    pricing.portfolio                   1,000 sites per scale step, one batch
+    db.upsert                           bulk insert of the history into a new DB
+    db.bulk_price_index                 calculate_bulk_price_index over all of it
+    excel.quote_workbook                the HUM.py export plus the history sheet
+
+Scaled cases (marked ×) run on synthetic history: the shipped history
+repeated scale times, each copy moved forward by the span of the original,
+so 100× is about 69,000 quote dates.
+
+A calibration workload (NumPy sort plus a Python loop) is timed in the same
+run and every result is stored as a ratio to it in baselines.json, so
+baselines survive a move to faster or slower hardware. --check fails when a
+case is more than --tolerance slower than its baseline ratio.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import asx_scraper   # noqa: E402
+import excel_export  # noqa: E402
+import futures_db    # noqa: E402
+import portfolio     # noqa: E402
+import pricing       # noqa: E402
+import update_db     # noqa: E402
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+SHIPPED_DB    = os.path.join(ROOT, 'futures_prices.db')
+FIXTURES      = [
+    os.path.join(ROOT, 'fixtures', 'asx', 'au_electricity.html'),
+    os.path.join(ROOT, 'fixtures', 'asx', 'weekend', 'au_electricity.html'),
+]
+
+DEFAULT_SCALES    = (1, 10, 100)
+DEFAULT_TOLERANCE = 0.5       # a case may be 50% slower than its baseline
+
+SITES_PER_SCALE = 1000
+
+# Sampling: SAMPLES medians of calls batched to at least MIN_SAMPLE seconds;
+# a case slower than SLOW_CASE seconds is timed once
+SAMPLES    = 5
+MIN_SAMPLE = 0.05
+SLOW_CASE  = 2.0
+
+QUOTE_INPUTS = dict(pricing.DEFAULT_INPUTS, off_peak_consumption=50.0)
+
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+class Context:
+    """Scratch directory with a migrated copy of the shipped database."""
+
+    def __init__(self, workdir: str):
+        self.workdir = workdir
+        self.db_path = os.path.join(workdir, 'futures_prices.db')
+        shutil.copy(SHIPPED_DB, self.db_path)
+        self.history = futures_db.load_futures_data(self.db_path).sort_values(['Quote Date', 'Year'])
+        self._scaled = {}
+        self._scaled_db = {}
+        self._counter = 0
+
+    def scratch_path(self, name: str) -> str:
+        self._counter += 1
+        return os.path.join(self.workdir, f'{name}-{self._counter}.db')
+
+    def scaled_history(self, scale: int) -> pd.DataFrame:
+        """The shipped history repeated scale times, each copy later than the last."""
+        if scale not in self._scaled:
+            dates = pd.to_datetime(self.history['Quote Date'])
+            span  = pd.Timedelta(days=(dates.max() - dates.min()).days + 7)
+            copies = []
+            for i in range(scale):
+                copy = self.history.copy()
+                copy['Quote Date'] = (dates + i * span).dt.strftime('%Y-%m-%d').to_numpy()
+                copies.append(copy)
+            self._scaled[scale] = pd.concat(copies, ignore_index=True)
+        return self._scaled[scale]
+
+    def scaled_db(self, scale: int) -> str:
+        """A database holding scaled_history(scale), built once."""
+        if scale not in self._scaled_db:
+            path = self.scratch_path(f'history-{scale}x')
+            conn = futures_db.connect(path)
+            try:
+                futures_db.upsert_futures_rows(conn, self.scaled_history(scale))
+            finally:
+                conn.close()
+            self._scaled_db[scale] = path
+        return self._scaled_db[scale]
+
+
+def read_fixture(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def quote_curve(ctx: Context) -> pd.DataFrame:
+    return futures_db.load_curve(ctx.db_path)
+
+
+def quote_rates(ctx: Context) -> tuple:
+    base = pricing.term_matrix(quote_curve(ctx)[list(pricing.STATES)])
+    return pricing.escalate(base), base / 10
+
+
+# ── Cases ──────────────────────────────────────────────────────────────────────
+# Each case is a setup function (ctx, scale) -> callable; only the callable is
+# timed. Unscaled cases only run at 1×.
+
+CASES = []
+
+
+def case(name: str, scaled: bool = True):
+    def register(setup):
+        CASES.append((name, scaled, setup))
+        return setup
+    return register
+
+
+@case('parse.extract_fy_prices_for_state', scaled=False)
+def _extract_fy_prices(ctx, scale):
+    soup = asx_scraper.make_soup(read_fixture(FIXTURES[0]))
+
+    def run():
+        for code, state in asx_scraper.BASE_STRIP_CODES.items():
+            update_db.extract_fy_prices_for_state(soup, code, state)
+    return run
+
+
+@case('parse.snapshot', scaled=False)
+def _parse_snapshot(ctx, scale):
+    pages = [read_fixture(path) for path in FIXTURES]
+
+    def run():
+        for content in pages:
+            update_db.parse_asx_snapshot(content)
+    return run
+
+
+@case('pricing.quote', scaled=False)
+def _price_quote(ctx, scale):
+    peak, off_peak = quote_rates(ctx)
+
+    def run():
+        result = pricing.calculate_bulk_prices(peak, off_peak, **QUOTE_INPUTS)
+        pricing.bulk_price(result)
+    return run
+
+
+@case('pricing.portfolio')
+def _price_portfolio(ctx, scale):
+    rng   = np.random.default_rng(0)
+    n     = SITES_PER_SCALE * scale
+    sites = pd.DataFrame({
+        'total_consumption': rng.uniform(1e5, 5e6, n),
+        'peak_consumption':  rng.uniform(30, 70, n),
+        'load_factor':       rng.uniform(0.3, 0.8, n),
+    })
+    curve = quote_curve(ctx)
+    return lambda: portfolio.price_portfolio(sites, curve=curve)
+
+
+@case('db.upsert')
+def _upsert(ctx, scale):
+    history = ctx.scaled_history(scale)
+
+    def run():
+        path = ctx.scratch_path('upsert')
+        conn = futures_db.connect(path)
+        try:
+            futures_db.upsert_futures_rows(conn, history)
+        finally:
+            conn.close()
+        os.remove(path)
+    return run
+
+
+@case('db.bulk_price_index')
+def _bulk_price_index(ctx, scale):
+    path = ctx.scaled_db(scale)
+    return lambda: futures_db.calculate_bulk_price_index(path)
+
+
+@case('excel.quote_workbook')
+def _excel(ctx, scale):
+    peak, off_peak = quote_rates(ctx)
+    result = pricing.calculate_bulk_prices(peak, off_peak, **QUOTE_INPUTS)
+    sheets = [(name, pricing.summary_table(result, name, 'NSW'), False) for name in pricing.TABLE_LABELS]
+    sheets.append(('History', ctx.scaled_history(scale), False))
+    return lambda: excel_export.write_workbook(sheets)
+
+
+# ── Runner ─────────────────────────────────────────────────────────────────────
+
+def time_call(run) -> float:
+    """Median seconds per call."""
+    start = time.perf_counter()
+    run()
+    first = time.perf_counter() - start
+    if first >= SLOW_CASE:
+        return first
+
+    number  = max(1, int(MIN_SAMPLE / max(first, 1e-9)))
+    samples = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def calibrate() -> float:
+    rng  = np.random.default_rng(0)
+    data = rng.random(1_000_000)
+
+    def run():
+        np.sort(data)
+        total = 0
+        for i in range(300_000):
+            total += i * i
+    return time_call(run)
+
+
+def load_baselines() -> dict:
+    try:
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baselines(baselines: dict):
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the HUMQuote hot paths offline')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES))
+    parser.add_argument('-k', dest='pattern', default='', help='only cases whose name contains this')
+    parser.add_argument('--check', action='store_true', help='exit 1 when a case regressed')
+    parser.add_argument('--update', action='store_true', help='store these results as the baselines')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    baselines   = load_baselines()
+    calibration = calibrate()
+    print(f"Calibration: {calibration * 1000:.1f} ms\n")
+    print(f"{'case':<44} {'time':>10} {'ratio':>9} {'baseline':>9}")
+
+    regressions = []
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = Context(workdir)
+        for name, scaled, setup in CASES:
+            for scale in (args.scales if scaled else [1]):
+                label = f'{name}[{scale}x]'
+                if args.pattern not in label:
+                    continue
+
+                # update_db reports progress on stdout; keep it out of the table
+                with contextlib.redirect_stdout(io.StringIO()):
+                    seconds = time_call(setup(ctx, scale))
+                ratio    = seconds / calibration
+                baseline = baselines.get(label)
+
+                flag = ''
+                if baseline is not None and ratio > baseline * (1 + args.tolerance):
+                    flag = '  ✗'
+                    regressions.append(f"{label}: {ratio:.3f} vs baseline {baseline:.3f}")
+                shown = f'{baseline:9.3f}' if baseline is not None else f"{'-':>9}"
+                print(f"{label:<44} {seconds * 1000:8.2f}ms {ratio:9.3f} {shown}{flag}")
+
+                if args.update:
+                    baselines[label] = round(ratio, 4)
+
+    if args.update:
+        save_baselines(baselines)
+        print(f"\n✓ Baselines written to {os.path.relpath(BASELINE_FILE, ROOT)}")
+
+    if regressions:
+        print()
+        for regression in regressions:
+            print(f"✗ {regression}")
+        return 1 if args.check else 0
+    if args.check:
+        print("\n✓ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Shared Futures Data Cache
+=========================
+Process-wide cached reads of futures_prices.db for the Streamlit pages.
+
+Every session on the server shares one in-memory frame per database version
+instead of re-reading the table per session. The cache key includes the
+database file's modification time and size, so a write by update_db.py or the
+HUM.py Fetch button invalidates it automatically on the next rerun.
+
+Frames returned here are shared between sessions: treat them as read-only
+and copy before modifying.
+
+The HUM.py Fetch button goes through fetch_latest_curve(), which is shared
+the same way:
+
+    1. a fetch for the expected market date that is younger than
+       FETCH_TTL_SECONDS is reused;
+    2. otherwise, if the daily job has already stored that day's curve in
+       futures_prices.db, it is served from there without touching ASX;
+    3. otherwise one caller fetches (single flight) while concurrent
+       callers wait on the lock and then reuse its result.
+"""
+
+import os
+import threading
+import time
+from datetime import date
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+import streamlit as st
+
+import asx_scraper
+import downsample
+import futures_db
+import pricing
+
+
+# Seconds a live ASX fetch is reused by every session
+FETCH_TTL_SECONDS = 300
+
+
+def db_version(db_path: str) -> tuple:
+    """Cheap change token for a database file: (mtime_ns, size)."""
+    try:
+        stat = os.stat(db_path)
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _futures_data(db_path: str, version: tuple) -> pd.DataFrame:
+    return futures_db.load_futures_data(db_path)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _bulk_price_index(db_path: str, index_db_path: str, version: tuple) -> pd.DataFrame:
+    futures_db.materialize_bulk_price_index(db_path, index_db_path)
+    return futures_db.load_bulk_price_index(index_db_path)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _curve(db_path: str, quote_date: date, version: tuple) -> pd.DataFrame:
+    return futures_db.load_curve(db_path, quote_date)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _quote_date_range(db_path: str, version: tuple) -> tuple:
+    return futures_db.quote_date_range(db_path)
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _region_history(db_path: str, region: str, start, end, periods, points, version: tuple) -> pd.DataFrame:
+    df = futures_db.load_region_history(db_path, region, start, end, periods=periods)
+    df['Quote Date'] = pd.to_datetime(df['Quote Date'])
+    if points:
+        df = downsample.downsample_groups(df, 'Quote Date', 'settle', 'period', points)
+    return df
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _periods(db_path: str, prefix: str, version: tuple) -> list:
+    return futures_db.list_periods(db_path, prefix=prefix)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _futures_page(db_path: str, start, end, periods, states, page: int, page_size: int, version: tuple) -> pd.DataFrame:
+    return futures_db.load_futures_page(db_path, start, end, periods, states, page, page_size)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _quote_day_count(db_path: str, start, end, periods, version: tuple) -> int:
+    return futures_db.count_quote_days(db_path, start, end, periods)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _index_page(index_db_path: str, start, end, states, page: int, page_size: int, version: tuple) -> pd.DataFrame:
+    return futures_db.load_bulk_price_index_page(index_db_path, start, end, states, page, page_size)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _index_count(index_db_path: str, start, end, version: tuple) -> int:
+    return futures_db.count_bulk_price_index(index_db_path, start, end)
+
+
+def load_futures_data(db_path: str = futures_db.DB_FILE_PATH) -> pd.DataFrame:
+    """Full futures history (newest first), shared across sessions."""
+    return _futures_data(db_path, db_version(db_path))
+
+
+def load_curve(db_path: str = futures_db.DB_FILE_PATH, quote_date: Optional[date] = None) -> pd.DataFrame:
+    """FY curve for the last trading day on or before quote_date (futures_db.load_curve), shared across sessions."""
+    return _curve(db_path, quote_date, db_version(db_path))
+
+
+def quote_date_range(db_path: str = futures_db.DB_FILE_PATH) -> tuple:
+    """(first, last) stored quote dates, shared across sessions."""
+    return _quote_date_range(db_path, db_version(db_path))
+
+
+def load_region_history(
+    db_path: str = futures_db.DB_FILE_PATH,
+    region: str = 'NSW',
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    periods: Optional[tuple] = None,
+    points: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    futures_db.load_region_history with Quote Date as datetime64, shared
+    across sessions. With points, each period is LTTB-downsampled to at most
+    that many rows over the requested window, so a narrower window comes
+    back in more detail.
+    """
+    return _region_history(db_path, region, start, end, periods, points, db_version(db_path))
+
+
+def list_periods(db_path: str = futures_db.DB_FILE_PATH, prefix: str = '') -> list:
+    """Stored Base Strip periods starting with prefix, shared across sessions."""
+    return _periods(db_path, prefix, db_version(db_path))
+
+
+def futures_history_page(
+    db_path: str = futures_db.DB_FILE_PATH,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    periods: Optional[tuple] = None,
+    states: tuple = tuple(pricing.STATES),
+    page: int = 0,
+    page_size: int = futures_db.DEFAULT_PAGE_DAYS,
+) -> pd.DataFrame:
+    """One page of futures history (futures_db.load_futures_page), shared across sessions."""
+    return _futures_page(db_path, start, end, periods, states, page, page_size, db_version(db_path))
+
+
+def count_quote_days(
+    db_path: str = futures_db.DB_FILE_PATH,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    periods: Optional[tuple] = None,
+) -> int:
+    """Quote dates matching a futures_history_page filter, shared across sessions."""
+    return _quote_day_count(db_path, start, end, periods, db_version(db_path))
+
+
+def bulk_price_index_page(
+    index_db_path: str = futures_db.INDEX_DB_FILE_PATH,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    states: tuple = tuple(pricing.STATES),
+    page: int = 0,
+    page_size: int = futures_db.DEFAULT_PAGE_DAYS,
+) -> pd.DataFrame:
+    """One page of the Bulk Price Index (futures_db.load_bulk_price_index_page), shared across sessions."""
+    return _index_page(index_db_path, start, end, states, page, page_size, db_version(index_db_path))
+
+
+def count_bulk_price_index(
+    index_db_path: str = futures_db.INDEX_DB_FILE_PATH,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> int:
+    """Index rows matching a bulk_price_index_page filter, shared across sessions."""
+    return _index_count(index_db_path, start, end, db_version(index_db_path))
+
+
+def load_bulk_price_index(
+    db_path: str = futures_db.DB_FILE_PATH,
+    index_db_path: str = futures_db.INDEX_DB_FILE_PATH,
+) -> pd.DataFrame:
+    """
+    Bulk Price Index history, shared across sessions. The index is brought up
+    to date once per futures database version, not once per session.
+    """
+    return _bulk_price_index(db_path, index_db_path, db_version(db_path))
+
+
+# ── Shared Fetch Data path ─────────────────────────────────────────────────────
+
+class CurveFetch(NamedTuple):
+    curve:      pd.DataFrame      # Quote Date | Year | NSW | VIC | QLD | SA
+    page_date:  Optional[date]    # calendar date shown on the ASX page
+    quote_date: date              # last trading day the curve belongs to
+    warnings:   tuple
+    source:     str               # 'asx' (fetched by this call), 'cache' or 'database'
+    fetched_at: float
+
+
+@st.cache_resource(show_spinner=False)
+def _fetch_state() -> dict:
+    return {'lock': threading.Lock(), 'entries': {}}
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def parse_page(digest: str, _content: bytes, _parse: Callable):
+    """
+    _parse(_content), memoised on the page digest for the whole process, so a
+    page that has not changed is parsed once however many sessions fetch it.
+    """
+    return _parse(_content)
+
+
+def _stored_curve(db_path: str, quote_date: date) -> Optional[CurveFetch]:
+    curve = futures_db.load_curve(db_path, quote_date)
+    if curve.empty or curve.index[0] != quote_date.isoformat():
+        return None
+    curve = curve.reset_index()
+    curve['Quote Date'] = quote_date
+    return CurveFetch(curve, None, quote_date, (), 'database', time.time())
+
+
+def fetch_latest_curve(
+    fetch: Callable[[], CurveFetch],
+    db_path: str = futures_db.DB_FILE_PATH,
+    ttl: float = FETCH_TTL_SECONDS,
+) -> CurveFetch:
+    """
+    The curve for the current ASX market date, shared across sessions (see
+    the module docstring). fetch() performs the live scrape and may raise;
+    only the caller that ran it gets source='asx' back, so only that caller
+    needs to write the result to the database.
+    """
+    expected = asx_scraper.last_trading_day(asx_scraper.market_today())
+    state    = _fetch_state()
+
+    def fresh() -> Optional[CurveFetch]:
+        entry = state['entries'].get(expected)
+        if entry is not None and time.time() - entry.fetched_at < ttl:
+            return entry._replace(source='cache')
+        return None
+
+    cached = fresh()
+    if cached is not None:
+        return cached
+
+    stored = _stored_curve(db_path, expected)
+    if stored is not None:
+        return stored
+
+    with state['lock']:
+        # Whoever held the lock before us may have fetched already
+        cached = fresh()
+        if cached is not None:
+            return cached
+
+        result = fetch()
+        now    = time.time()
+        state['entries'] = {
+            day: entry for day, entry in state['entries'].items() if now - entry.fetched_at < ttl
+        }
+        # Keyed on the page's market date; also on the expected date, so a
+        # page that has not rolled over yet is not re-fetched every click
+        state['entries'][result.quote_date] = result
+        state['entries'][expected]          = result
+        return result
@@ -0,0 +1,88 @@
+"""
+Excel Export
+============
+Streaming workbook writer for the HUM.py quote export and for headless
+portfolio runs:
+
+    sheets = [('Bulk Prices', summary_of_rates, False), ('Peak Prices', peak_df, True)]
+    data   = write_workbook(sheets)                    # xlsx bytes
+    write_workbook([('Portfolio', prices, True)], 'portfolio.xlsx')
+
+Sheets are (name, frame, index) tuples, written in order. The workbook is
+opened in xlsxwriter's constant_memory mode and every sheet is written row by
+row, so only the current row is held in memory and a portfolio with tens of
+thousands of sites exports in flat RAM. NaN and infinite values are left as
+blank cells, as DataFrame.to_excel does, and dates (Timestamps and plain
+datetime.date values alike) get a yyyy-mm-dd format.
+
+sheets_key() digests the sheet contents so callers can cache the bytes and
+only rebuild the workbook when something in it changed.
+"""
+
+import hashlib
+import math
+from datetime import date, datetime
+from io import BytesIO
+from typing import Optional
+
+import pandas as pd
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def sheets_key(sheets) -> str:
+    """Digest of every sheet's name, labels and values."""
+    digest = hashlib.sha1()
+    for name, df, index in sheets:
+        digest.update(repr((name, index, list(df.columns), df.index.names)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=index).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _cell(value):
+    # Blank cells for missing and non-finite numbers; xlsxwriter rejects NaN / inf
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+# ── Writer ─────────────────────────────────────────────────────────────────────
+
+def _write_sheet(workbook, name: str, df: pd.DataFrame, index: bool, header_format, date_format):
+    worksheet = workbook.add_worksheet(name)
+    labels = [n if n is not None else '' for n in df.index.names] if index else []
+    worksheet.write_row(0, 0, labels + [str(c) for c in df.columns], header_format)
+
+    frame = df.reset_index() if index else df
+    for row, values in enumerate(frame.itertuples(index=False, name=None), start=1):
+        for col, value in enumerate(values):
+            value = _cell(value.item() if hasattr(value, 'item') else value)
+            if value is None:
+                continue
+            if isinstance(value, pd.Timestamp):
+                value = value.to_pydatetime()
+            if isinstance(value, (date, datetime)):
+                worksheet.write_datetime(row, col, value, date_format)
+            else:
+                worksheet.write(row, col, value)
+
+
+def write_workbook(sheets, path: Optional[str] = None) -> Optional[bytes]:
+    """
+    Writes sheets to path, or to memory when path is None and returns the
+    xlsx bytes.
+    """
+    from xlsxwriter import Workbook
+
+    target   = path if path is not None else BytesIO()
+    workbook = Workbook(target, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+    date_format   = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+    try:
+        for name, df, index in sheets:
+            _write_sheet(workbook, name, df, index, header_format, date_format)
+    finally:
+        workbook.close()
+    return None if path is not None else target.getvalue()
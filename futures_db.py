@@ -0,0 +1,728 @@
+"""
+Futures Database Access
+=======================
+Streamlit-free helpers for the SQLite databases behind the app:
+
+    futures_prices.db   futures_curve    : quote_day | product | region | period | settle | ...
+    futures_prices.db   futures_data     : view, Quote Date | Year | NSW | VIC | QLD | SA
+    bulk_price_index.db bulk_price_index : Quote Date | NSW | VIC | QLD | SA
+
+futures_curve is the normalised store: one row per contract per trading day,
+with quote_day held as an integer day number (days since 1970-01-01). Its
+primary key and two covering indexes serve the three access paths:
+
+    one contract's history   PRIMARY KEY (product, region, period, quote_day)
+    latest / as-of curve     futures_curve_by_day    (product, quote_day, period, ...)
+    date range for a region  futures_curve_by_region (region, product, quote_day, ...)
+
+futures_data, the original wide table, is now a view over the FY Base Strip
+rows with the old column names, so existing queries and notebooks keep
+working. ensure_schema() migrates an older database in place the first time
+it is opened through connect().
+
+Rows are written by update_db.py and the HUM.py Fetch button; the Bulk Price
+Index is materialised from them by materialize_bulk_price_index().
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import date, timedelta
+from typing import Optional, Sequence, Union
+
+import pandas as pd
+
+import pricing
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+DB_FILE_PATH = 'futures_prices.db'
+TABLE_NAME   = 'futures_data'       # compatibility view (wide FY Base Strip)
+CURVE_TABLE_NAME = 'futures_curve'  # normalised long table
+
+# Schema version stored in PRAGMA user_version
+SCHEMA_VERSION = 1
+
+BASE_STRIP_PRODUCT = 'H'
+
+INDEX_DB_FILE_PATH    = 'bulk_price_index.db'
+INDEX_TABLE_NAME      = 'bulk_price_index'
+INDEX_META_TABLE_NAME = 'bulk_price_index_meta'
+
+_EPOCH = date(1970, 1, 1)
+
+
+# ── Dates ──────────────────────────────────────────────────────────────────────
+
+def date_text(value) -> str:
+    """Normalises a date / datetime / string to YYYY-MM-DD text."""
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+
+
+def to_day(value) -> int:
+    """Date / datetime / YYYY-MM-DD string → integer day number."""
+    return (date.fromisoformat(date_text(value)[:10]) - _EPOCH).days
+
+
+def from_day(day: int) -> str:
+    """Integer day number → YYYY-MM-DD text."""
+    return (_EPOCH + timedelta(days=int(day))).isoformat()
+
+
+# SQL equivalents of from_day() / to_day()
+_DAY_TO_TEXT = "date(quote_day * 86400, 'unixepoch')"
+_TEXT_TO_DAY = "CAST(ROUND(julianday({}) - 2440587.5) AS INTEGER)"
+
+
+# ── Schema ─────────────────────────────────────────────────────────────────────
+
+def _wide_select(where: str = '', order: str = '') -> str:
+    # FY Base Strip rows pivoted to one row per (quote_day, period); only
+    # periods quoted for all four states are kept, as the scraper always did.
+    pivots   = ', '.join(
+        f"MAX(CASE WHEN region = '{s}' THEN settle END) AS \"{s}\"" for s in pricing.STATES
+    )
+    complete = ' AND '.join(f'"{s}" IS NOT NULL' for s in pricing.STATES)
+    return f'''
+        SELECT quote_day, period, {pivots}
+          FROM {CURVE_TABLE_NAME}
+         WHERE product = '{BASE_STRIP_PRODUCT}' AND period LIKE 'FY%' {where}
+         GROUP BY quote_day, period
+        HAVING {complete} {order}'''
+
+
+def _wide_columns(states=pricing.STATES) -> str:
+    states = ', '.join(f'"{s}"' for s in states)
+    return (f'{_DAY_TO_TEXT} AS "Quote Date", '
+            f'2000 + CAST(substr(period, 3) AS INTEGER) AS "Year", {states}')
+
+
+def _object_type(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    row = conn.execute('SELECT type FROM sqlite_master WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else None
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """
+    Creates or migrates the futures schema to SCHEMA_VERSION.
+
+    Version 1 moves the wide futures_data table (and the interim
+    futures_contracts table) into futures_curve inside one transaction, then
+    replaces futures_data with a view of the same shape.
+    """
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+        return
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Another process may have migrated while we waited for the lock
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            conn.rollback()
+            return
+
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {CURVE_TABLE_NAME} (
+                quote_day INTEGER NOT NULL,
+                product   TEXT    NOT NULL,
+                region    TEXT    NOT NULL,
+                period    TEXT    NOT NULL,
+                settle    REAL,
+                volume    INTEGER,
+                bid       REAL,
+                ask       REAL,
+                last      REAL,
+                change    REAL,
+                contract  TEXT,
+                PRIMARY KEY (product, region, period, quote_day)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS {CURVE_TABLE_NAME}_by_day
+                ON {CURVE_TABLE_NAME} (product, quote_day, period, region, settle)
+        ''')
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS {CURVE_TABLE_NAME}_by_region
+                ON {CURVE_TABLE_NAME} (region, product, quote_day, period, settle)
+        ''')
+
+        if _object_type(conn, TABLE_NAME) == 'table':
+            for state in pricing.STATES:
+                conn.execute(f'''
+                    INSERT INTO {CURVE_TABLE_NAME} (quote_day, product, region, period, settle)
+                    SELECT {_TEXT_TO_DAY.format('"Quote Date"')}, '{BASE_STRIP_PRODUCT}', '{state}',
+                           printf('FY%02d', "Year" % 100), "{state}"
+                      FROM {TABLE_NAME}
+                     WHERE "{state}" IS NOT NULL
+                        ON CONFLICT DO NOTHING
+                ''')
+            conn.execute(f'DROP TABLE {TABLE_NAME}')
+
+        if _object_type(conn, 'futures_contracts') == 'table':
+            conn.execute(f'''
+                INSERT INTO {CURVE_TABLE_NAME}
+                       (quote_day, product, region, period, settle, volume, bid, ask, last, change, contract)
+                SELECT {_TEXT_TO_DAY.format('"Quote Date"')}, product, region, period,
+                       settle, volume, bid, ask, last, change, contract
+                  FROM futures_contracts
+                 WHERE true
+                    ON CONFLICT DO UPDATE SET
+                       settle = excluded.settle, volume = excluded.volume,
+                       bid = excluded.bid, ask = excluded.ask, last = excluded.last,
+                       change = excluded.change, contract = excluded.contract
+            ''')
+            conn.execute('DROP TABLE futures_contracts')
+
+        if _object_type(conn, TABLE_NAME) is None:
+            conn.execute(f'CREATE VIEW {TABLE_NAME} AS SELECT {_wide_columns()} FROM ({_wide_select()})')
+
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def connect(db_path: str = DB_FILE_PATH) -> sqlite3.Connection:
+    """Opens the futures database, migrating it to the current schema first."""
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_schema(conn)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+# ── Reads ──────────────────────────────────────────────────────────────────────
+
+def _read_wide(conn: sqlite3.Connection, where: str = '', params: tuple = (), order: str = 'ASC',
+               states=pricing.STATES) -> pd.DataFrame:
+    query = f'''
+        SELECT {_wide_columns(states)}
+          FROM ({_wide_select(where)})
+         ORDER BY quote_day {order}, period
+    '''
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def load_curve(
+    db_path: str = DB_FILE_PATH,
+    quote_date: Optional[Union[date, str]] = None,
+) -> pd.DataFrame:
+    """
+    Returns the FY curve quoted on the last trading day on or before
+    quote_date (the latest stored curve when quote_date is None), shaped like
+    the scraper output:
+
+        index: Quote Date | Year | NSW | VIC | QLD | SA
+
+    The lookup is a seek on futures_curve_by_day. The frame is empty when no
+    curve exists on or before the requested date.
+    """
+    latest = '' if quote_date is None else 'AND quote_day <= ?'
+    params = () if quote_date is None else (to_day(quote_date),)
+    where  = f'''AND quote_day = (
+        SELECT MAX(quote_day) FROM {CURVE_TABLE_NAME}
+         WHERE product = '{BASE_STRIP_PRODUCT}' {latest})'''
+    conn = connect(db_path)
+    try:
+        df = _read_wide(conn, where, params)
+    finally:
+        conn.close()
+    return df.set_index('Quote Date')
+
+
+def quote_date_range(db_path: str = DB_FILE_PATH) -> tuple:
+    """(first, last) quote dates with a stored FY curve, or (None, None)."""
+    conn = connect(db_path)
+    try:
+        first, last = conn.execute(
+            f"SELECT MIN(quote_day), MAX(quote_day) FROM {CURVE_TABLE_NAME} WHERE product = ?",
+            (BASE_STRIP_PRODUCT,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if first is None:
+        return None, None
+    return date.fromisoformat(from_day(first)), date.fromisoformat(from_day(last))
+
+
+def load_futures_data(db_path: str = DB_FILE_PATH) -> pd.DataFrame:
+    """Full futures history in the wide shape, newest quote date first."""
+    conn = connect(db_path)
+    try:
+        return _read_wide(conn, order='DESC')
+    finally:
+        conn.close()
+
+
+def load_daily_average_curve(
+    db_path: str = DB_FILE_PATH,
+    since: Optional[Union[date, str]] = None,
+) -> pd.DataFrame:
+    """
+    Average FY settle per state for every quote date, in one grouped query:
+
+        Quote Date | NSW | VIC | QLD | SA
+
+    Only quote dates on or after since are returned when it is given; that
+    range is an index scan on futures_curve_by_day.
+    """
+    averages = ', '.join(f'AVG("{s}") AS "{s}"' for s in pricing.STATES)
+    where  = '' if since is None else 'AND quote_day >= ?'
+    params = () if since is None else (to_day(since),)
+    query = f'''
+        SELECT {_DAY_TO_TEXT} AS "Quote Date", {averages}
+          FROM ({_wide_select(where)})
+         GROUP BY quote_day
+         ORDER BY quote_day
+    '''
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+
+def load_region_history(
+    db_path: str = DB_FILE_PATH,
+    region: str = 'NSW',
+    start: Optional[Union[date, str]] = None,
+    end: Optional[Union[date, str]] = None,
+    product: str = BASE_STRIP_PRODUCT,
+    periods: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Every period of one product in one region between start and end
+    (inclusive), or only the given periods, read with a range scan on
+    futures_curve_by_region:
+
+        Quote Date | period | settle
+    """
+    params = [region, product,
+              -1 if start is None else to_day(start),
+              2 ** 31 if end is None else to_day(end)]
+    period_filter = ''
+    if periods is not None:
+        period_filter = f"AND period IN ({', '.join('?' * len(periods))})"
+        params.extend(periods)
+    query = f'''
+        SELECT {_DAY_TO_TEXT} AS "Quote Date", period, settle
+          FROM {CURVE_TABLE_NAME}
+         WHERE region = ? AND product = ? AND quote_day BETWEEN ? AND ? {period_filter}
+         ORDER BY quote_day, period
+    '''
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(query, conn, params=tuple(params))
+    finally:
+        conn.close()
+
+
+def list_periods(db_path: str = DB_FILE_PATH, product: str = BASE_STRIP_PRODUCT, prefix: str = '') -> list:
+    """Distinct stored periods of a product starting with prefix, e.g. ['FY27', 'FY28']."""
+    query = f'''
+        SELECT DISTINCT period FROM {CURVE_TABLE_NAME}
+         WHERE product = ? AND period LIKE ? || '%'
+         ORDER BY period
+    '''
+    conn = connect(db_path)
+    try:
+        return [row[0] for row in conn.execute(query, (product, prefix))]
+    finally:
+        conn.close()
+
+
+def load_contract_history(
+    db_path: str = DB_FILE_PATH,
+    product: str = BASE_STRIP_PRODUCT,
+    region: str = 'NSW',
+    period: str = 'FY27',
+) -> pd.DataFrame:
+    """
+    Daily history of one contract, read straight off the primary key:
+
+        Quote Date | settle | volume | bid | ask | last | change
+    """
+    query = f'''
+        SELECT {_DAY_TO_TEXT} AS "Quote Date", settle, volume, bid, ask, last, change
+          FROM {CURVE_TABLE_NAME}
+         WHERE product = ? AND region = ? AND period = ?
+         ORDER BY quote_day
+    '''
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(query, conn, params=(product, region, period))
+    finally:
+        conn.close()
+
+
+# ── Paged history ──────────────────────────────────────────────────────────────
+# The tracker pages page by quote date, newest first. Days are counted and
+# picked with the same FY, all-states predicate the pivot applies, so every
+# counted day renders rows. A page is found by grouping futures_curve_by_day
+# backwards until it is full, and only that window of days is then pivoted,
+# so the first page costs the same however long the history is.
+
+DEFAULT_PAGE_DAYS = 20
+
+
+def _history_filter(start, end, periods) -> tuple:
+    where  = 'AND quote_day BETWEEN ? AND ?'
+    params = [-1 if start is None else to_day(start), 2 ** 31 if end is None else to_day(end)]
+    if periods is not None:
+        where += f" AND period IN ({', '.join('?' * len(periods))})"
+        params.extend(periods)
+    return where, params
+
+
+def count_quote_days(
+    db_path: str = DB_FILE_PATH,
+    start: Optional[Union[date, str]] = None,
+    end: Optional[Union[date, str]] = None,
+    periods: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Number of quote dates in the filter with an FY period quoted for every
+    state (the days load_futures_page() returns rows for), for paging.
+    """
+    where, params = _history_filter(start, end, periods)
+    conn = connect(db_path)
+    try:
+        return conn.execute(
+            f"SELECT COUNT(DISTINCT quote_day) FROM ({_wide_select(where)})", params
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def load_futures_page(
+    db_path: str = DB_FILE_PATH,
+    start: Optional[Union[date, str]] = None,
+    end: Optional[Union[date, str]] = None,
+    periods: Optional[Sequence[str]] = None,
+    states: Sequence[str] = pricing.STATES,
+    page: int = 0,
+    page_size: int = DEFAULT_PAGE_DAYS,
+) -> pd.DataFrame:
+    """
+    One page (page_size quote dates, page 0 newest) of the wide futures
+    history between start and end, limited to the given FY periods and state
+    columns:
+
+        Quote Date | Year | <states>
+    """
+    where, params = _history_filter(start, end, periods)
+    conn = connect(db_path)
+    try:
+        # Grouped newest first off futures_curve_by_day, so the walk stops
+        # once the page is filled; an outer ORDER BY would sort every day
+        newest = _wide_select(where, 'ORDER BY quote_day DESC, period DESC')
+        days = [row[0] for row in conn.execute(
+            f'SELECT DISTINCT quote_day FROM ({newest}) LIMIT ? OFFSET ?',
+            params + [page_size, page * page_size]
+        )]
+        if not days:
+            return pd.DataFrame(columns=['Quote Date', 'Year'] + list(states))
+        # Same filter, narrowed to the page's days
+        return _read_wide(conn, where, tuple([days[-1], days[0]] + params[2:]), order='DESC', states=states)
+    finally:
+        conn.close()
+
+
+def calculate_bulk_price_index(
+    db_path: str = DB_FILE_PATH,
+    since: Optional[Union[date, str]] = None,
+) -> pd.DataFrame:
+    """
+    Historical Bulk Price Index ($/kWh) per state, computed as column
+    arithmetic over the daily average curve:
+
+        Quote Date | NSW | VIC | QLD | SA
+    """
+    df = load_daily_average_curve(db_path, since)
+    states = list(pricing.STATES)
+    df[states] = pricing.bulk_price_index(df[states].to_numpy())
+    return df
+
+
+# ── Writes ─────────────────────────────────────────────────────────────────────
+
+FUTURES_COLUMNS = ['Quote Date', 'Year'] + list(pricing.STATES)
+
+CONTRACT_COLUMNS = ['Quote Date', 'product', 'region', 'period', 'contract',
+                    'bid', 'ask', 'last', 'change', 'volume', 'settle']
+
+
+def upsert_futures_rows(conn: sqlite3.Connection, df: pd.DataFrame, replace: bool = False) -> pd.Series:
+    """
+    Stores scraper-shaped rows (Quote Date | Year | NSW | VIC | QLD | SA) as
+    FY Base Strip settles in futures_curve, in a single executemany inside
+    one transaction. Contracts that already exist for that day are left
+    untouched by ON CONFLICT DO NOTHING, unless replace is set: their settle
+    is then overwritten in row order, so the last row for a key wins.
+
+    Returns a boolean Series over df's index, True for rows that added a
+    contract (inserted) and False for rows already stored (skipped or, with
+    replace, overwritten). It is read off conn.total_changes as the insert
+    runs, without a SELECT.
+    """
+    ensure_schema(conn)
+    rows = [
+        (to_day(qd), BASE_STRIP_PRODUCT, state, f'FY{int(year) % 100:02d}', float(price))
+        for qd, year, *prices in df[FUTURES_COLUMNS].itertuples(index=False, name=None)
+        for state, price in zip(pricing.STATES, prices)
+    ]
+
+    # executemany steps each row before asking for the next, so the change
+    # counter read between rows tells which of them inserted
+    counts = []
+
+    def counted(params):
+        for row in params:
+            counts.append(conn.total_changes)
+            yield row
+
+    with conn:
+        conn.executemany(
+            f'''INSERT INTO {CURVE_TABLE_NAME} (quote_day, product, region, period, settle)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT DO NOTHING''',
+            counted(rows)
+        )
+        counts.append(conn.total_changes)
+        added = [after > before for before, after in zip(counts, counts[1:])]
+        if replace:
+            conn.executemany(
+                f'''UPDATE {CURVE_TABLE_NAME} SET settle = ?
+                   WHERE quote_day = ? AND product = ? AND region = ? AND period = ?''',
+                ((settle, *key) for (*key, settle), new in zip(rows, added) if not new)
+            )
+
+    width = len(pricing.STATES)
+    return pd.Series([any(added[i:i + width]) for i in range(0, len(added), width)],
+                     index=df.index, dtype=bool)
+
+
+def upsert_contract_rows(conn: sqlite3.Connection, df: pd.DataFrame) -> int:
+    """
+    Writes long-format contract rows (CONTRACT_COLUMNS) to futures_curve in
+    one executemany. A re-scrape of the same quote date replaces that day's
+    values, so the latest bid / ask / settle wins. Returns the number of rows
+    written.
+    """
+    ensure_schema(conn)
+    rows = [
+        (to_day(qd), *(None if pd.isna(v) else v for v in rest))
+        for qd, *rest in df[CONTRACT_COLUMNS].itertuples(index=False, name=None)
+    ]
+    before = conn.total_changes
+    with conn:
+        conn.executemany(
+            f'''INSERT INTO {CURVE_TABLE_NAME}
+                   (quote_day, product, region, period, contract, bid, ask, last, change, volume, settle)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT DO UPDATE SET
+                   contract = excluded.contract, bid = excluded.bid, ask = excluded.ask,
+                   last = excluded.last, change = excluded.change,
+                   volume = excluded.volume, settle = excluded.settle''',
+            rows
+        )
+    return conn.total_changes - before
+
+
+# ── Bulk Price Index materialisation ───────────────────────────────────────────
+
+def index_parameter_hash() -> str:
+    """Fingerprint of every constant that feeds the Bulk Price Index."""
+    params = {
+        'inputs':         pricing.INDEX_INPUTS,
+        'off_peak_ratio': pricing.INDEX_OFF_PEAK_RATIO,
+        'net_loss':       pricing.NET_LOSS_FACTOR,
+        'hours':          pricing.HOURS_PER_YEAR,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def _ensure_index_meta(conn: sqlite3.Connection):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {INDEX_META_TABLE_NAME} (
+            "key"   TEXT PRIMARY KEY,
+            "value" TEXT
+        )
+    ''')
+
+
+def mark_index_stale(
+    since: Union[date, str],
+    index_db_path: str = INDEX_DB_FILE_PATH,
+    table_name: str = INDEX_TABLE_NAME,
+):
+    """
+    Records that futures rows from since onwards changed after the index was
+    last materialised, so the next incremental run recomputes from there.
+    Called after writes that can land before the newest indexed date
+    (update_db.py import / replay); an earlier pending date is kept.
+    """
+    conn = sqlite3.connect(index_db_path)
+    try:
+        _ensure_index_meta(conn)
+        conn.execute(
+            f'''INSERT INTO {INDEX_META_TABLE_NAME} ("key", "value") VALUES (?, ?)
+               ON CONFLICT("key") DO UPDATE SET "value" = MIN("value", excluded."value")''',
+            (f'{table_name}.stale_since', date_text(since)[:10])
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _has_primary_key(conn: sqlite3.Connection, table_name: str) -> bool:
+    # Tables written by the old to_sql(if_exists='replace') path have no key
+    columns = conn.execute(f'PRAGMA table_info({table_name})').fetchall()
+    return any(col[5] for col in columns)
+
+
+def materialize_bulk_price_index(
+    db_path: str = DB_FILE_PATH,
+    index_db_path: str = INDEX_DB_FILE_PATH,
+    incremental: bool = True,
+    table_name: str = INDEX_TABLE_NAME,
+) -> int:
+    """
+    Brings the bulk_price_index table up to date and returns the number of
+    rows written.
+
+    Incremental mode recomputes quote dates from the last materialised date
+    onwards (that date is included in case it was topped up later in the day),
+    or from the date recorded by mark_index_stale() when older dates were
+    written since, and upserts them; both are single-row reads. A full
+    rebuild happens instead when incremental is False, the table does not
+    exist yet or predates the keyed schema, or the stored parameter hash no
+    longer matches index_parameter_hash().
+    """
+    states     = list(pricing.STATES)
+    param_hash = index_parameter_hash()
+
+    conn = sqlite3.connect(index_db_path)
+    try:
+        _ensure_index_meta(conn)
+        stored = conn.execute(
+            f'SELECT "value" FROM {INDEX_META_TABLE_NAME} WHERE "key" = ?',
+            (f'{table_name}.param_hash',)
+        ).fetchone()
+
+        rebuild = (
+            not incremental
+            or stored is None
+            or stored[0] != param_hash
+            or not _has_primary_key(conn, table_name)
+        )
+
+        since = None
+        if rebuild:
+            conn.execute(f'DROP TABLE IF EXISTS {table_name}')
+            conn.execute(f'''
+                CREATE TABLE {table_name} (
+                    "Quote Date" TEXT PRIMARY KEY,
+                    "NSW"        REAL,
+                    "VIC"        REAL,
+                    "QLD"        REAL,
+                    "SA"         REAL
+                )
+            ''')
+        else:
+            since = conn.execute(f'SELECT MAX("Quote Date") FROM {table_name}').fetchone()[0]
+            stale = conn.execute(
+                f'SELECT "value" FROM {INDEX_META_TABLE_NAME} WHERE "key" = ?',
+                (f'{table_name}.stale_since',)
+            ).fetchone()
+            if stale is not None and (since is None or stale[0] < since):
+                since = stale[0]
+
+        df = calculate_bulk_price_index(db_path, since=since)
+
+        columns = ', '.join(f'"{c}"' for c in ['Quote Date'] + states)
+        updates = ', '.join(f'"{s}" = excluded."{s}"' for s in states)
+        conn.executemany(
+            f'''INSERT INTO {table_name} ({columns}) VALUES ({', '.join('?' * (len(states) + 1))})
+               ON CONFLICT("Quote Date") DO UPDATE SET {updates}''',
+            df[['Quote Date'] + states].itertuples(index=False, name=None)
+        )
+        conn.execute(
+            f'''INSERT INTO {INDEX_META_TABLE_NAME} ("key", "value") VALUES (?, ?)
+               ON CONFLICT("key") DO UPDATE SET "value" = excluded."value"''',
+            (f'{table_name}.param_hash', param_hash)
+        )
+        conn.execute(f'DELETE FROM {INDEX_META_TABLE_NAME} WHERE "key" = ?', (f'{table_name}.stale_since',))
+        conn.commit()
+        return len(df)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def load_bulk_price_index(
+    index_db_path: str = INDEX_DB_FILE_PATH,
+    table_name: str = INDEX_TABLE_NAME,
+) -> pd.DataFrame:
+    """Reads the materialised index: Quote Date | NSW | VIC | QLD | SA."""
+    columns = ', '.join(f'"{c}"' for c in ['Quote Date'] + list(pricing.STATES))
+    conn = sqlite3.connect(index_db_path)
+    try:
+        return pd.read_sql_query(
+            f'SELECT {columns} FROM {table_name} ORDER BY "Quote Date"', conn
+        )
+    finally:
+        conn.close()
+
+
+def _index_filter(start, end) -> tuple:
+    return ('"Quote Date" BETWEEN ? AND ?',
+            ('0000-00-00' if start is None else date_text(start), '9999-99-99' if end is None else date_text(end)))
+
+
+def count_bulk_price_index(
+    index_db_path: str = INDEX_DB_FILE_PATH,
+    start: Optional[Union[date, str]] = None,
+    end: Optional[Union[date, str]] = None,
+    table_name: str = INDEX_TABLE_NAME,
+) -> int:
+    """Number of materialised index rows between start and end, for paging."""
+    where, params = _index_filter(start, end)
+    conn = sqlite3.connect(index_db_path)
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {table_name} WHERE {where}', params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def load_bulk_price_index_page(
+    index_db_path: str = INDEX_DB_FILE_PATH,
+    start: Optional[Union[date, str]] = None,
+    end: Optional[Union[date, str]] = None,
+    states: Sequence[str] = pricing.STATES,
+    page: int = 0,
+    page_size: int = DEFAULT_PAGE_DAYS,
+    table_name: str = INDEX_TABLE_NAME,
+) -> pd.DataFrame:
+    """
+    One page (page 0 newest) of the materialised index between start and
+    end, read backwards off the "Quote Date" primary key:
+
+        Quote Date | <states>
+    """
+    where, params = _index_filter(start, end)
+    columns = ', '.join(f'"{c}"' for c in ['Quote Date'] + list(states))
+    conn = sqlite3.connect(index_db_path)
+    try:
+        return pd.read_sql_query(
+            f'''SELECT {columns} FROM {table_name} WHERE {where}
+                ORDER BY "Quote Date" DESC LIMIT ? OFFSET ?''',
+            conn, params=params + (page_size, page * page_size)
+        )
+    finally:
+        conn.close()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Import-Time Report
+==================
+Measures what each Streamlit page costs to import on a cold server start,
+before anything reaches the browser, and checks it against
+import_budget.json:
+
+    python import_report.py             report every page
+    python import_report.py --check     exit 1 when a page is over budget
+    python import_report.py --update    store the current timings as the budget
+
+Each page's module-level import statements are run in a fresh interpreter
+with -X importtime, several times, and the median is kept. Timings are given
+relative to a bare `import streamlit` measured the same way in the same
+run, so the budget holds on a fast laptop and a slow CI runner alike. The
+budget also lists heavy packages a page must not load at import; that check
+does not depend on timing at all.
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+ROOT        = os.path.dirname(os.path.abspath(__file__))
+BUDGET_FILE = os.path.join(ROOT, 'import_budget.json')
+
+REFERENCE = 'import streamlit'
+
+# Allowed slack over the stored ratio before --check fails
+TOLERANCE = 0.25
+
+RUNS = 5
+
+# Child process: run the imports, report wall time and every loaded module
+_CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<page imports>", "exec"))
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+'''
+
+
+def pages() -> list:
+    """Entry scripts, relative to the repo root."""
+    return ['HUM.py'] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+
+
+# ── Measurement ────────────────────────────────────────────────────────────────
+
+def page_imports(path: str) -> str:
+    """The page's module-level import statements as source."""
+    with open(os.path.join(ROOT, path), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    return '\n'.join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _run(code: str) -> tuple:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD, code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # -X importtime lines: "import time: self [us] | cumulative | name";
+    # names without indentation are the imports the page itself triggered
+    heaviest = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  ', 1):
+            heaviest.append((int(cumulative) / 1e6, name.strip()))
+    heaviest.sort(reverse=True)
+    return report['seconds'], report['modules'], heaviest
+
+
+_startup = None
+
+
+def _startup_imports() -> set:
+    # Imported by the interpreter itself (site, encodings, ...), not the page
+    global _startup
+    if _startup is None:
+        _startup = {name for _seconds, name in _run('')[2]}
+    return _startup
+
+
+def measure(code: str, runs: int = RUNS) -> dict:
+    samples  = [_run(code) for _ in range(runs)]
+    median   = statistics.median(s[0] for s in samples)
+    modules  = samples[0][1]
+    heaviest = [(t, name) for t, name in samples[len(samples) // 2][2] if name not in _startup_imports()]
+    return {'seconds': median, 'modules': modules, 'heaviest': heaviest[:5]}
+
+
+# ── Budget ─────────────────────────────────────────────────────────────────────
+
+def load_budget() -> dict:
+    try:
+        with open(BUDGET_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'ratios': {}, 'forbidden': {}}
+
+
+def save_budget(budget: dict):
+    with open(BUDGET_FILE, 'w', encoding='utf-8') as f:
+        json.dump(budget, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Import-time report for the Streamlit pages')
+    parser.add_argument('--check', action='store_true', help='fail when a page is over budget')
+    parser.add_argument('--update', action='store_true', help='store the current ratios as the budget')
+    parser.add_argument('--runs', type=int, default=RUNS, help='fresh interpreters per measurement')
+    args = parser.parse_args(argv)
+
+    budget    = load_budget()
+    reference = measure(REFERENCE, args.runs)['seconds']
+    print(f"Reference ({REFERENCE}): {reference * 1000:.0f} ms\n")
+
+    failures = []
+    for page in pages():
+        result = measure(page_imports(page), args.runs)
+        ratio  = result['seconds'] / reference
+        limit  = budget['ratios'].get(page)
+
+        status = ''
+        if limit is not None:
+            status = f"(budget {limit:.2f}×)"
+            if ratio > limit * (1 + TOLERANCE):
+                failures.append(f"{page}: {ratio:.2f}× the reference import, budget {limit:.2f}×")
+        # Dotted names, e.g. plotly.express: streamlit itself imports the plotly package
+        banned = sorted(set(budget['forbidden'].get(page, [])) & set(result['modules']))
+        if banned:
+            failures.append(f"{page}: imports {', '.join(banned)} at startup")
+
+        print(f"{page}")
+        print(f"  {result['seconds'] * 1000:6.0f} ms   {ratio:.2f}× reference  {status}")
+        for seconds, name in result['heaviest']:
+            print(f"    {seconds * 1000:6.0f} ms  {name}")
+
+        if args.update:
+            budget['ratios'][page] = round(ratio, 2)
+
+    if args.update:
+        save_budget(budget)
+        print(f"\n✓ Budget written to {os.path.basename(BUDGET_FILE)}")
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f"✗ {failure}")
+        return 1 if args.check else 0
+    if args.check:
+        print("\n✓ Every page is within its import budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,11 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-from io import BytesIO
-from xlsxwriter import Workbook
 
+import data_cache
+import perf
+import table_render
+
+
+perf.start_run('Futures Price Tracker')
 
 st.set_page_config(
     page_title='HUMQuote - Futures Price Tracker', 
@@ -42,63 +38,92 @@ st.title("📈 Futures Price Tracker")
 #########################################################################################################
 #########################################################################################################
 
-# Function to fetch data from the database, sorted by "Quote Date" in descending order
-def fetch_data_from_database(db_path):
-    # Connect to the SQLite database
-    conn = sqlite3.connect(db_path)
-    # Modify the query to include an ORDER BY clause for "Quote Date" in descending order
-    query = "SELECT * FROM futures_data ORDER BY `Quote Date` DESC"
-    # Execute the query and fetch the data
-    df = pd.read_sql_query(query, conn)
-    # Close the database connection
-    conn.close()
-    return df
-
-# Function to initialize and store the DataFrame in session state
-def initialize_data():
-    # Check if 'futures_data' is not in session state or you need to refresh it
-    if 'futures_data' not in st.session_state:
-        # Fetch the data from the database and store it in session state
-        st.session_state['futures_data'] = fetch_data_from_database('futures_prices.db')
-
+# Quote dates per page of the history table
+HISTORY_PAGE_DAYS = 20
 
-
-# Example of using the DataFrame in your Streamlit app
 def display_data_table():
-    # Access the DataFrame from the session state
-    df = st.session_state['futures_data'].set_index('Quote Date')
-
-    # Display the DataFrame in the app
-    expander_futures = st.expander("**Historical Futures Data**", expanded=False)
-    with expander_futures:
-        st.table(df)
-
-    # Optional: Download button for the data
-    csv = df.to_csv(index=True).encode('utf-8')
-    st.download_button("Download as CSV", csv, "historical-futures-data.csv", "text/csv", key='download-csv')
+    # Nothing is read until the section is opened; then only the filtered page
+    # is queried, through the futures_curve indexes
+    if not table_render.lazy_section("**Historical Futures Data**", key='show_history'):
+        return
+
+    with perf.span('sqlite.history_filters'):
+        first, last = data_cache.quote_date_range('futures_prices.db')
+        all_periods = data_cache.list_periods('futures_prices.db', prefix='FY')
+    if first is None:
+        st.info("No futures data stored yet.")
+        return
+
+    c1, c2, c3 = st.columns([2, 1, 1])
+    start, end = first, last
+    if first < last:
+        start, end = c1.slider("Quote dates", min_value=first, max_value=last, value=(first, last),
+                               format="DD MMM YYYY", key='history_range')
+    periods = c2.multiselect("FY contracts", all_periods, default=all_periods, key='history_periods')
+    states  = c3.multiselect("States", ["NSW", "VIC", "QLD", "SA"], default=["NSW", "VIC", "QLD", "SA"],
+                             key='history_states')
+    if not periods or not states:
+        st.info("Select at least one FY contract and one state.")
+        return
+
+    periods, states = tuple(periods), tuple(states)
+    with perf.span('sqlite.history_count'):
+        total = data_cache.count_quote_days('futures_prices.db', start, end, periods)
+    page = table_render.page_selector(total, HISTORY_PAGE_DAYS, key='history_page', unit='quote dates')
+    with perf.span('sqlite.history_page'):
+        df = data_cache.futures_history_page('futures_prices.db', start, end, periods, states,
+                                             page, HISTORY_PAGE_DAYS)
+    st.dataframe(df.set_index('Quote Date'), use_container_width=True)
+
+    # The whole filtered selection is only read once a CSV is asked for
+    selection_key = (start, end, periods, states)
+    if st.button("📄 Prepare CSV", key='prepare-csv'):
+        st.session_state['futures_csv_key'] = selection_key
+    if st.session_state.get('futures_csv_key') == selection_key:
+        with perf.span('sqlite.history_selection'):
+            selection = data_cache.futures_history_page('futures_prices.db', start, end, periods, states,
+                                                        0, max(total, 1))
+        csv = selection.set_index('Quote Date').to_csv(index=True).encode('utf-8')
+        st.download_button("Download as CSV", csv, "historical-futures-data.csv", "text/csv", key='download-csv')
+
+
+# Points per FY contract sent to the browser. The chart is re-read for the
+# selected date range, so narrowing the range brings back more detail.
+CHART_POINTS = 1000
 
-
-# Assuming the DataFrame is already stored in the session state as 'futures_data'
-# Make sure this function is called after 'initialize_data()' is called
 def display_chart():
-    df = st.session_state['futures_data']
-
     # Dropdown for selecting the column to plot
     selected_column = st.selectbox("Select State to plot:", ["NSW", "VIC", "QLD", "SA"])
 
-    # Create a Plotly line chart
-    fig = px.line(df, x="Quote Date", y=selected_column, color="Year",
-                  labels={"Quote Date": "Quote Date", selected_column: "$AUD/MWh"},
-                  title=f"{selected_column} Futures Prices Over Time")
-
-    # Increase the height of the chart here
-    fig.update_layout(height=500)
-
-    # Display the Plotly chart
-    st.plotly_chart(fig, use_container_width=True)
-
-    # Display the DataFrame
-    #st.write(df)
+    with perf.span('sqlite.quote_date_range'):
+        first, last = data_cache.quote_date_range('futures_prices.db')
+    if first is None:
+        st.info("No futures data stored yet.")
+        return
+    start, end = first, last
+    if first < last:
+        start, end = st.slider("Date range", min_value=first, max_value=last, value=(first, last),
+                               format="DD MMM YYYY", key='chart_range')
+
+    # LTTB-downsampled history of every FY contract, read for the selected window only
+    with perf.span('sqlite.region_history'):
+        periods = tuple(data_cache.list_periods('futures_prices.db', prefix='FY'))
+        df = data_cache.load_region_history('futures_prices.db', selected_column, start, end,
+                                            periods=periods, points=CHART_POINTS)
+
+    # WebGL traces, one per FY contract; plotly is loaded after the header has painted
+    with perf.span('plotly.history'):
+        import plotly.graph_objects as go
+        fig = go.Figure()
+        for period, trace in df.groupby('period', sort=True):
+            fig.add_trace(go.Scattergl(x=trace['Quote Date'], y=trace['settle'], mode='lines',
+                                       name=str(2000 + int(period[2:]))))
+        fig.update_layout(title=f"{selected_column} Futures Prices Over Time",
+                          xaxis_title="Quote Date", yaxis_title="$AUD/MWh", legend_title_text="Year",
+                          height=500)
+
+        # Display the Plotly chart
+        st.plotly_chart(fig, use_container_width=True)
 
 
 #########################################################################################################
@@ -108,12 +133,10 @@ def display_chart():
 #########################################################################################################
 
 
-# Call the function to initialize the data on app start or when needed
-initialize_data()
-
-# Ensure to call initialize_data() before this if it's not already done
-# Example of using the DataFrame and chart in your Streamlit app
 display_chart()
 
 # Assuming this is a multi-page app, you can call display_data on any page
 display_data_table()
+
+perf.finish_run()
+perf.debug_panel()
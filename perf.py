@@ -0,0 +1,218 @@
+"""
+Rerun Timing
+============
+Lightweight timing spans around the hot paths of HUM.py and the pages:
+
+    perf.start_run('HUM.py')              top of the script, once per rerun
+    with perf.span('asx.fetch'):          around each stage; spans nest
+        ...
+    perf.finish_run()                     bottom of the script
+    perf.debug_panel()                    sidebar breakdown, hidden by default
+
+Span names start with the stage they measure, so a slow quote can be put
+down to one of them:
+
+    asx.*       ASX request            parse.*     BeautifulSoup parsing
+    sqlite.*    database reads/writes  pricing.*   pricing engine
+    plotly.*    figure build and serialization (st.plotly_chart)
+    excel.*     workbook build
+
+Cached calls are timed as they happen, so a cache hit shows as a span of a
+few milliseconds and a miss as the full cost.
+
+finish_run() writes every span as one JSON line on the 'humquote.perf'
+logger (stderr, or the file named by HUMQUOTE_PERF_LOG; 'off' disables it),
+followed by one line for the whole run, and keeps the last RUN_HISTORY runs
+in the session. The panel is shown once the app is opened with ?debug=perf
+and stays on for the rest of the session.
+
+Streamlit-free except for finish_run() and debug_panel(). Outside a run
+span() records nothing, so instrumented code still runs unchanged from
+update_db.py and the benchmarks.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+RUN_HISTORY = 20
+
+LOGGER_NAME = 'humquote.perf'
+LOG_ENV     = 'HUMQUOTE_PERF_LOG'
+
+QUERY_PARAM = ('debug', 'perf')
+
+_HISTORY_KEY = 'perf_runs'
+_ENABLED_KEY = 'perf_debug'
+
+
+# ── Spans ──────────────────────────────────────────────────────────────────────
+
+class Span(NamedTuple):
+    name:     str
+    parent:   Optional[str]     # enclosing span's name, None at the top level
+    depth:    int
+    start_ms: float             # offset from the start of the run
+    ms:       float
+
+
+class Run:
+    """Spans recorded during one script rerun."""
+
+    def __init__(self, page: str):
+        self.id      = uuid.uuid4().hex[:12]
+        self.page    = page
+        self.started = time.time()
+        self.origin  = time.perf_counter()
+        self.spans   = []
+        self.total_ms = None
+        self._open   = []           # names of the spans currently open
+
+    def stages(self) -> dict:
+        """Milliseconds per top-level span name, summed over repeats."""
+        totals = {}
+        for s in self.spans:
+            if s.depth == 0:
+                totals[s.name] = totals.get(s.name, 0.0) + s.ms
+        return totals
+
+
+# Streamlit runs each session's script on its own thread
+_local = threading.local()
+
+
+def current_run() -> Optional[Run]:
+    return getattr(_local, 'run', None)
+
+
+def start_run(page: str) -> Run:
+    """Begins timing a rerun; an unfinished previous run (st.stop, an error) is dropped."""
+    _local.run = Run(page)
+    return _local.run
+
+
+@contextmanager
+def span(name: str):
+    """Times the block as a span of the current run; a no-op outside one."""
+    run = current_run()
+    if run is None:
+        yield
+        return
+
+    parent = run._open[-1] if run._open else None
+    run._open.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        run._open.pop()
+        run.spans.append(Span(name, parent, len(run._open),
+                              (start - run.origin) * 1000, (end - start) * 1000))
+
+
+# ── Logging ────────────────────────────────────────────────────────────────────
+
+_logger_lock = threading.Lock()
+
+
+def _logger() -> logging.Logger:
+    logger = logging.getLogger(LOGGER_NAME)
+    with _logger_lock:
+        if not logger.handlers:
+            target = os.environ.get(LOG_ENV, '')
+            if target.lower() == 'off':
+                handler = logging.NullHandler()
+            elif target:
+                handler = logging.FileHandler(target, encoding='utf-8')
+            else:
+                handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
+
+
+def log_records(run: Run) -> list:
+    """One dict per span, then one for the run, as written to the log."""
+    ts = datetime.fromtimestamp(run.started, timezone.utc).isoformat(timespec='milliseconds')
+    records = [
+        {'ts': ts, 'event': 'span', 'page': run.page, 'run': run.id, 'span': s.name, 'parent': s.parent,
+         'depth': s.depth, 'start_ms': round(s.start_ms, 3), 'ms': round(s.ms, 3)}
+        for s in run.spans
+    ]
+    records.append({'ts': ts, 'event': 'run', 'page': run.page, 'run': run.id,
+                    'spans': len(run.spans), 'ms': round(run.total_ms, 3)})
+    return records
+
+
+# ── Streamlit ──────────────────────────────────────────────────────────────────
+
+def finish_run() -> Optional[Run]:
+    """Closes the current run, logs its spans and adds it to the session history."""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+    run.total_ms = (time.perf_counter() - run.origin) * 1000
+
+    logger = _logger()
+    if logger.isEnabledFor(logging.INFO):
+        for record in log_records(run):
+            logger.info(json.dumps(record))
+
+    import streamlit as st
+    history = st.session_state.setdefault(_HISTORY_KEY, [])
+    history.append(run)
+    del history[:-RUN_HISTORY]
+    return run
+
+
+def debug_panel():
+    """Per-stage timings of the session's last runs, when ?debug=perf is set."""
+    import streamlit as st
+
+    name, value = QUERY_PARAM
+    if st.query_params.get(name) == value:
+        st.session_state[_ENABLED_KEY] = True
+    if not st.session_state.get(_ENABLED_KEY):
+        return
+
+    runs = list(reversed(st.session_state.get(_HISTORY_KEY, [])))
+    if not runs:
+        return
+
+    import pandas as pd
+
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        # Newest run first, one column per top-level stage
+        summary = pd.DataFrame([
+            dict(Page=r.page, Total=r.total_ms, Other=r.total_ms - sum(r.stages().values()), **r.stages())
+            for r in runs
+        ])
+        stages = [c for c in summary.columns if c not in ('Page', 'Total', 'Other')]
+        summary = summary[['Page', 'Total'] + stages + ['Other']]
+        st.caption(f"Milliseconds per rerun, last {len(runs)} of up to {RUN_HISTORY}")
+        st.dataframe(summary.style.format("{:.1f}", subset=summary.columns[1:], na_rep=''),
+                     use_container_width=True, hide_index=True)
+
+        latest = runs[0]
+        st.caption(f"Latest rerun ({latest.page}), every span")
+        spans  = sorted(latest.spans, key=lambda s: (s.start_ms, s.depth))
+        detail = pd.DataFrame({
+            'Span':     ['· ' * s.depth + s.name for s in spans],
+            'Start ms': [s.start_ms for s in spans],
+            'ms':       [s.ms for s in spans],
+        })
+        st.dataframe(detail.style.format("{:.1f}", subset=['Start ms', 'ms']),
+                     use_container_width=True, hide_index=True)
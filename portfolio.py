@@ -0,0 +1,78 @@
+"""
+Portfolio Bulk Pricing
+======================
+Headless batch quoting for large C&I portfolios. Prices N customer sites
+against one futures curve in a single vectorised call to the pricing engine,
+using the same formulas as HUM.calculate_bulk_prices.
+
+Example:
+
+    import pandas as pd
+    from portfolio import price_portfolio
+
+    sites  = pd.read_csv('sites.csv', index_col='site_id')
+    prices = price_portfolio(sites, quote_date='2026-08-21')
+
+The sites frame has one row per site. Columns are named after the sidebar
+inputs (see pricing.DEFAULT_INPUTS); only total_consumption is required and
+any other missing column falls back to the sidebar default. Two optional
+columns control the curve escalation per site:
+
+    load_factor_escalation | retail_factor_escalation
+"""
+
+from datetime import date
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+import pricing
+from futures_db import DB_FILE_PATH, load_curve
+
+
+def price_portfolio(
+    sites: pd.DataFrame,
+    quote_date: Optional[Union[date, str]] = None,
+    db_path: str = DB_FILE_PATH,
+    curve: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Returns the average bulk price ($/kWh) of every site in every state:
+
+        index: sites.index | NSW | VIC | QLD | SA
+
+    The curve is read from db_path for the last trading day on or before
+    quote_date, unless a scraper-shaped curve frame is passed in directly.
+    """
+    if 'total_consumption' not in sites.columns:
+        raise ValueError("sites must include a 'total_consumption' column")
+
+    if curve is None:
+        curve = load_curve(db_path, quote_date)
+    if curve.empty:
+        raise ValueError(f"No futures curve found on or before {quote_date}")
+
+    base = pricing.term_matrix(curve[list(pricing.STATES)])
+
+    def column(name, default):
+        if name in sites.columns:
+            return sites[name].to_numpy(dtype=float)
+        return np.full(len(sites), default, dtype=float)
+
+    inputs = {name: column(name, default) for name, default in pricing.DEFAULT_INPUTS.items()}
+    # Off-peak share defaults to the remainder, as in the sidebar
+    # (np.where, not a masked assignment: the column may be a read-only view of sites)
+    off_peak = column('off_peak_consumption', np.nan)
+    inputs['off_peak_consumption'] = np.where(
+        np.isnan(off_peak), 100 - inputs['peak_consumption'] - inputs['shoulder_consumption'], off_peak
+    )
+
+    peak = pricing.escalate(
+        base,
+        column('load_factor_escalation',   pricing.DEFAULT_LOAD_ESCALATION),
+        column('retail_factor_escalation', pricing.DEFAULT_RETAIL_ESCALATION),
+    )
+    result = pricing.calculate_bulk_prices(peak, base / 10, **inputs)
+
+    return pd.DataFrame(pricing.bulk_price(result), index=sites.index, columns=list(pricing.STATES))
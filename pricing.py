@@ -0,0 +1,397 @@
+"""
+Bulk Electricity Pricing Engine
+===============================
+Pure-NumPy implementation of the bulk price formulas shared by HUM.py and the
+Bulk Price Tracker page. The module has no Streamlit dependency and imports
+only NumPy at load time, so it can be benchmarked, cached and run in worker
+processes independently of the UI.
+
+The engine prices every state and every contract year in one batched call.
+Rate matrices are shaped (..., years, states) and every quote input may be a
+scalar or an array broadcastable to the leading (...) batch shape, so the
+same code prices a single quote, a portfolio of sites or a grid of scenarios.
+
+Each table is returned as an array shaped (..., rows, years, states) whose
+rows follow the labels in TABLE_LABELS. Averages over the contract years are
+taken with average_over_years().
+"""
+
+import numpy as np
+
+
+# ── Constants ──────────────────────────────────────────────────────────────────
+
+STATES = ('NSW', 'VIC', 'QLD', 'SA')
+
+CONTRACT_YEARS = 3
+
+HOURS_PER_YEAR = 8760
+
+TRANSMISSION_LOSS_FACTOR = 1.00860
+DISTRIBUTION_LOSS_FACTOR = 1.04344
+NET_LOSS_FACTOR          = TRANSMISSION_LOSS_FACTOR * DISTRIBUTION_LOSS_FACTOR
+
+# Row labels for each output table, keyed by the table's first column header.
+TABLE_LABELS = {
+    'energy_rates': ('Tariffs & Factors', [
+        'Peak Tariff (c/kWh)',
+        'Shoulder Tariff (c/kWh)',
+        'Off Peak Tariff (c/kWh)',
+        'Transmission Loss Factor',
+        'Distribution Loss Factor',
+        'Net Loss Factor (NLF)',
+        'Peak Tariff (Adj for Losses) (c/kWh)',
+        'Shoulder Tariff (Adj for Losses) (c/kWh)',
+        'Off Peak Tariff (Adj for Losses) (c/kWh)']),
+    'consumption': ('Energy Consumption', [
+        'Total Consumption (kWh)',
+        'Peak Consumption (kWh)',
+        'Shoulder Consumption (kWh)',
+        'Off Peak Consumption (kWh)',
+        'Load Factor',
+        'Avg. Monthly Peak Demand (kVA)']),
+    'charges': ('Costs per Unit', [
+        'Peak Energy Charge (c/kWh)',
+        'Shoulder Energy Charge (c/kWh)',
+        'Off Peak Energy Charge (c/kWh)',
+        'Peak Demand Charge ($/kVA)',
+        'Network Volume Charge (c/kWh)',
+        'Other Volume Charge (c/kWh)',
+        'Fixed Charge ($/day)']),
+    'costs': ('Annual Costs', [
+        'Peak Energy Costs ($/year)',
+        'Shoulder Energy Costs ($/year)',
+        'Off Peak Energy Costs ($/year)',
+        'Peak Demand Costs ($/year)',
+        'Network Volume Costs ($/year)',
+        'Other Volume Costs ($/year)',
+        'Fixed Costs ($/year)',
+        'Total Costs ($/year)',
+        'kWh/year',
+        'Bundled Bulk Cost ($/kWh)']),
+    'rates': ('Rates Summary', [
+        'Energy ($/kWh)',
+        'Network ($/kWh)',
+        'Other ($/kWh)',
+        'Fixed ($/kWh)',
+        'Total ($/kWh)']),
+}
+
+# Row index of the bundled total in the 'rates' table.
+TOTAL_RATE_ROW = 4
+
+# Sidebar defaults (Energex 8300 network); used for any input a caller omits.
+DEFAULT_INPUTS = {
+    'total_consumption':              400000.00,
+    'peak_consumption':               50.00,
+    'shoulder_consumption':           0.00,
+    'load_factor':                    0.55,
+    'peak_charge':                    2.8140,
+    'nuos_charge':                    13.4270,
+    'service_availability_charge':    7.7240,
+    'aemo_participant_charge':        0.09910,
+    'aemo_ancillary_services_charge': 0.09910,
+    'srec_charge':                    1.09040,
+    'lrec_charge':                    1.0000,
+    'metering_charge':                100.00,
+    'retail_service_charge':          0.00,
+    'admin_charge':                   0.00,
+}
+
+DEFAULT_LOAD_ESCALATION   = 1.15
+DEFAULT_RETAIL_ESCALATION = 1.15
+
+# Network tariff presets offered in the sidebar.
+NETWORK_TARIFFS = {
+    "Energex 8300": {"Peak Charge": 2.8140,
+                     "Off-Peak Charge": 2.8140,
+                     "Shoulder Charge": 2.8140,
+                     "NUOS Charge": 13.4270,
+                     "Service Availability Charge": 7.7240},
+    "Energex 8100": {"Peak Charge": 1.3010,
+                     "Off-Peak Charge": 1.3010,
+                     "Shoulder Charge": 1.3010,
+                     "NUOS Charge": 15.7730,
+                     "Service Availability Charge": 37.7400},
+    "BLNT1AO":      {"Peak Charge": 20.4161,
+                     "Off-Peak Charge": 8.4967,
+                     "Shoulder Charge": 15.9733,
+                     "NUOS Charge": 0.0000,
+                     "Service Availability Charge": 2.2229},
+    "BLND3AO":      {"Peak Charge": 6.1763,
+                     "Off-Peak Charge": 3.2273,
+                     "Shoulder Charge": 4.9580,
+                     "NUOS Charge": 0.0000,
+                     "Service Availability Charge": 20.8017},
+}
+
+# Fixed reference site behind the historical Bulk Price Index. The index is
+# priced off the unescalated average FY settle, with off-peak at 85% of peak.
+INDEX_INPUTS = {
+    'total_consumption':              400000,
+    'peak_consumption':               50.0,
+    'shoulder_consumption':           0.0,
+    'off_peak_consumption':           50.0,
+    'load_factor':                    0.55,
+    'peak_charge':                    0.96,
+    'nuos_charge':                    14.67,
+    'service_availability_charge':    5.38,
+    'aemo_participant_charge':        0.09910,
+    'aemo_ancillary_services_charge': 0.09910,
+    'srec_charge':                    1.09040,
+    'lrec_charge':                    1.0000,
+    'metering_charge':                100.00,
+    'retail_service_charge':          0.00,
+    'admin_charge':                   0.00,
+}
+
+INDEX_OFF_PEAK_RATIO = 0.85
+
+
+# ── Curve preparation ──────────────────────────────────────────────────────────
+
+def contract_term_rows(n_available: int, years: int = CONTRACT_YEARS) -> np.ndarray:
+    """
+    Row positions used for contract years 1..years.
+
+    Year N reads row N-1 of the futures curve; when fewer rows are available
+    the last row is reused, matching the clamp in the original scalar loop.
+    """
+    if n_available < 1:
+        raise ValueError("At least one futures row is required to price a quote")
+    return np.minimum(np.arange(years), n_available - 1)
+
+
+def term_matrix(values, years: int = CONTRACT_YEARS) -> np.ndarray:
+    """Selects the (years, states) block from a (rows, states) futures curve."""
+    values = np.asarray(values, dtype=float)
+    return values[..., contract_term_rows(values.shape[-2], years), :]
+
+
+def _expand(value) -> np.ndarray:
+    # Scalar or (...) input → (..., 1, 1) so it broadcasts over years × states.
+    return np.asarray(value, dtype=float)[..., np.newaxis, np.newaxis]
+
+
+def escalate(base_rates, load_escalation=DEFAULT_LOAD_ESCALATION,
+             retail_escalation=DEFAULT_RETAIL_ESCALATION) -> np.ndarray:
+    """
+    Converts $/MWh settle prices to escalated c/kWh peak rates, rounded to
+    2 dp exactly like HUM.apply_escalation_and_format. Escalation factors may
+    be arrays over a leading batch axis.
+    """
+    rates = np.asarray(base_rates, dtype=float) / 10 * _expand(load_escalation) * _expand(retail_escalation)
+    return np.round(rates, 2)
+
+
+# ── Engine ─────────────────────────────────────────────────────────────────────
+
+def _stack(rows, like: np.ndarray) -> np.ndarray:
+    # Broadcast every row to the full (..., years, states) shape, then stack
+    # the rows along a new table axis.
+    shape = np.broadcast_shapes(like.shape, *(np.shape(r) for r in rows))
+    return np.stack([np.broadcast_to(r, shape) for r in rows], axis=-3)
+
+
+def calculate_bulk_prices(
+    peak_rates,
+    off_peak_rates,
+    total_consumption,
+    peak_consumption,
+    shoulder_consumption,
+    off_peak_consumption,
+    load_factor,
+    peak_charge,
+    nuos_charge,
+    service_availability_charge,
+    aemo_participant_charge,
+    aemo_ancillary_services_charge,
+    srec_charge,
+    lrec_charge,
+    metering_charge,
+    retail_service_charge,
+    admin_charge,
+    shoulder_rates=None,
+    **_ignored,
+) -> dict:
+    """
+    Prices every contract year and state in one vectorised pass.
+
+    peak_rates / off_peak_rates are c/kWh matrices shaped (..., years, states);
+    shoulder_rates defaults to the peak rates. Consumption splits are given in
+    percent. Remaining keyword arguments mirror the sidebar inputs collected in
+    st.session_state['calculation_results'] so that dict can be passed with **.
+
+    Returns a dict of arrays keyed like TABLE_LABELS, each shaped
+    (..., rows, years, states).
+    """
+    peak_rates     = np.asarray(peak_rates,     dtype=float)
+    off_peak_rates = np.asarray(off_peak_rates, dtype=float)
+    shoulder_rates = peak_rates if shoulder_rates is None else np.asarray(shoulder_rates, dtype=float)
+
+    # A zero consumption or load factor yields inf/nan in the tables rather than
+    # raising, so a half-edited sidebar never crashes the page.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = _expand(total_consumption)
+
+        # Tariffs adjusted for network losses
+        peak_energy_adj     = peak_rates     * NET_LOSS_FACTOR
+        shoulder_energy_adj = shoulder_rates * NET_LOSS_FACTOR
+        off_peak_energy_adj = off_peak_rates * NET_LOSS_FACTOR
+
+        # Consumption
+        load        = _expand(load_factor)
+        peak_demand = total / HOURS_PER_YEAR / load
+        peak_kwh     = total * (_expand(peak_consumption)     / 100)
+        shoulder_kwh = total * (_expand(shoulder_consumption) / 100)
+        off_peak_kwh = total * (_expand(off_peak_consumption) / 100)
+
+        # Unit charges
+        peak_volume    = _expand(nuos_charge)
+        network_volume = _expand(peak_charge)
+        other_volume   = _expand(aemo_participant_charge) + _expand(aemo_ancillary_services_charge) \
+                         + _expand(srec_charge) + _expand(lrec_charge)
+        fixed          = _expand(service_availability_charge) \
+                         + (_expand(metering_charge) + _expand(retail_service_charge) + _expand(admin_charge)) / 30
+
+        # Annual costs
+        peak_energy_costs     = peak_kwh     * (peak_energy_adj     / 100)
+        shoulder_energy_costs = shoulder_kwh * (shoulder_energy_adj / 100)
+        off_peak_energy_costs = off_peak_kwh * (off_peak_energy_adj / 100)
+        peak_demand_costs     = peak_demand * peak_volume * 12
+        network_volume_costs  = total * (network_volume / 100)
+        other_volume_costs    = total * (other_volume   / 100)
+        fixed_costs           = fixed * 365
+        total_costs           = (peak_energy_costs + shoulder_energy_costs +
+                                 off_peak_energy_costs + peak_demand_costs +
+                                 network_volume_costs + other_volume_costs + fixed_costs)
+        bundled_cost          = total_costs / total
+
+        # Rates per kWh
+        energy  = (peak_energy_costs + shoulder_energy_costs + off_peak_energy_costs) / total
+        network = (peak_demand_costs + network_volume_costs) / total
+        other   = other_volume_costs / total
+        fixed_r = fixed_costs / total
+
+        return {
+            'energy_rates': _stack([
+                peak_rates, shoulder_rates, off_peak_rates,
+                TRANSMISSION_LOSS_FACTOR, DISTRIBUTION_LOSS_FACTOR, NET_LOSS_FACTOR,
+                peak_energy_adj, shoulder_energy_adj, off_peak_energy_adj], peak_rates),
+            'consumption': _stack([
+                total, peak_kwh, shoulder_kwh, off_peak_kwh, load, peak_demand], peak_rates),
+            'charges': _stack([
+                peak_energy_adj, shoulder_energy_adj, off_peak_energy_adj,
+                peak_volume, network_volume, other_volume, fixed], peak_rates),
+            'costs': _stack([
+                peak_energy_costs, shoulder_energy_costs, off_peak_energy_costs,
+                peak_demand_costs, network_volume_costs, other_volume_costs,
+                fixed_costs, total_costs, total, bundled_cost], peak_rates),
+            'rates': _stack([
+                energy, network, other, fixed_r, energy + network + other + fixed_r], peak_rates),
+        }
+
+
+def average_over_years(table: np.ndarray) -> np.ndarray:
+    """Mean across the contract-year axis of a (..., rows, years, states) table."""
+    return table.mean(axis=-2)
+
+
+def bulk_price(result: dict) -> np.ndarray:
+    """Average bundled total ($/kWh) per state, shaped (..., states)."""
+    return average_over_years(result['rates'])[..., TOTAL_RATE_ROW, :]
+
+
+def bulk_price_index(settle_prices) -> np.ndarray:
+    """
+    Bulk Price Index ($/kWh) for average FY settle prices in $/MWh.
+
+    settle_prices may have any shape, e.g. (dates, states); the index is
+    returned in the same shape.
+    """
+    peak_rates = np.asarray(settle_prices, dtype=float)[..., np.newaxis, :] / 10
+    result = calculate_bulk_prices(peak_rates, peak_rates * INDEX_OFF_PEAK_RATIO, **INDEX_INPUTS)
+    return result['rates'][..., TOTAL_RATE_ROW, 0, :]
+
+
+# ── Scenario sweeps ────────────────────────────────────────────────────────────
+
+# Inputs a sweep can vary: key → (label, default low, default high, min, max).
+# The two escalation factors apply to the peak curve; the rest are quote inputs.
+SWEEP_AXES = {
+    'load_factor':       ('Load Factor',              0.45, 0.75, 0.05,   1.00),
+    'peak_consumption':  ('Peak Consumption (%)',     30.0, 70.0, 0.00, 100.00),
+    'load_escalation':   ('Load Escalation Factor',   1.05, 1.25, 0.50,   2.00),
+    'retail_escalation': ('Retail Escalation Factor', 1.05, 1.25, 0.50,   2.00),
+}
+
+
+def scenario_sweep(base_rates, inputs: dict, axes: dict,
+                   load_escalation=DEFAULT_LOAD_ESCALATION,
+                   retail_escalation=DEFAULT_RETAIL_ESCALATION) -> np.ndarray:
+    """
+    Average bulk price ($/kWh) over the Cartesian product of axes, for every
+    state, in one batched call.
+
+    base_rates is the (years, states) settle block in $/MWh (term_matrix of
+    the scraped curve); inputs are the sidebar inputs and axes maps
+    SWEEP_AXES keys (or any input name) to 1-D value arrays. Each axis gets
+    its own leading dimension, so only the result is materialised at full
+    grid size. Off-peak consumption follows a swept peak share as the
+    remainder, as it does in the sidebar.
+
+    Returns an array shaped (len(axis_1), ..., len(axis_n), states).
+    """
+    names  = list(axes)
+    values = {}
+    for i, name in enumerate(names):
+        shape = [1] * len(names)
+        shape[i] = -1
+        values[name] = np.asarray(axes[name], dtype=float).reshape(shape)
+
+    quote = dict(inputs)
+    quote.update({name: v for name, v in values.items() if name not in ('load_escalation', 'retail_escalation')})
+    if 'peak_consumption' in values and 'off_peak_consumption' not in values:
+        quote['off_peak_consumption'] = 100 - quote['peak_consumption'] - quote['shoulder_consumption']
+
+    base = np.asarray(base_rates, dtype=float)
+    peak = escalate(base,
+                    values.get('load_escalation', load_escalation),
+                    values.get('retail_escalation', retail_escalation))
+    result = calculate_bulk_prices(peak, base / 10, **quote)
+
+    grid = tuple(len(np.atleast_1d(axes[name])) for name in names)
+    return np.broadcast_to(bulk_price(result), grid + (len(STATES),))
+
+
+# ── Presentation ───────────────────────────────────────────────────────────────
+
+def summary_table(result: dict, name: str, state: str):
+    """
+    Builds the display DataFrame for one table and state:
+
+        <label column> | Year 1 | Year 2 | Year 3 | Average
+    """
+    import pandas as pd
+
+    header, labels = TABLE_LABELS[name]
+    table = result[name][..., STATES.index(state)]
+    frame = pd.DataFrame({header: labels})
+    for year in range(table.shape[-1]):
+        frame[f'Year {year + 1}'] = table[:, year]
+    frame['Average'] = table.mean(axis=-1)
+    return frame
+
+
+def sweep_frame(axes: dict, prices: np.ndarray):
+    """
+    Long-format table of a scenario_sweep() result, one row per grid point:
+
+        <axis 1> | ... | <axis n> | NSW | VIC | QLD | SA
+    """
+    import pandas as pd
+
+    names = list(axes)
+    index = pd.MultiIndex.from_product([np.asarray(axes[n], dtype=float) for n in names], names=names)
+    frame = pd.DataFrame(prices.reshape(-1, len(STATES)), index=index, columns=list(STATES))
+    return frame.reset_index()
@@ -0,0 +1,137 @@
+"""
+Monte Carlo Price Risk
+======================
+Distribution of the bulk price locked into a 3-year contract, from the
+historical volatility of the FY Base Strip curve in futures_data.
+
+    history = futures_db.load_futures_data()
+    cov     = return_covariance(curve_returns(history))
+    prices  = simulate_bulk_prices(base_rates, inputs, cov)     # (paths, states)
+    price_percentiles(prices)                                   # P5 / P50 / P95
+
+Daily log returns are taken per contract and lined up by curve position
+(front FY, second FY, third FY) for every state, so a roll from FY27 to
+FY28 never shows up as a price jump. Their 12×12 covariance drives
+correlated log-normal moves of the whole curve over the horizon, and every
+simulated curve is priced with the same formulas as a live quote. Paths are
+generated and priced in chunks, so memory stays bounded at any path count.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import pricing
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+DEFAULT_PATHS        = 100_000
+DEFAULT_HORIZON_DAYS = 20     # trading days between quote and contract lock-in
+DEFAULT_LOOKBACK     = 250    # trading days of history behind the covariance
+CHUNK_SIZE           = 20_000
+
+PERCENTILES = (5, 50, 95)
+
+
+# ── Volatility estimate ────────────────────────────────────────────────────────
+
+def curve_returns(history: pd.DataFrame, lookback: Optional[int] = DEFAULT_LOOKBACK,
+                  years: int = pricing.CONTRACT_YEARS) -> np.ndarray:
+    """
+    Daily log returns of the FY curve, one row per quote date and one column
+    per (curve position, state), ordered position-major to match
+    term_matrix(curve).ravel():
+
+        history : Quote Date | Year | NSW | VIC | QLD | SA   (futures_data)
+        returns : (days, years * states)
+
+    Only the last lookback quote dates are used (all when None); dates where
+    any position is missing, e.g. the first day of a new FY contract, are
+    dropped.
+    """
+    states = list(pricing.STATES)
+    df = history.sort_values(['Quote Date', 'Year'])
+    df = df.assign(position=df.groupby('Quote Date').cumcount())
+    df = df[df['position'] < years]
+
+    # Returns per contract between consecutive stored quote dates
+    prices  = df.pivot(index='Quote Date', columns='Year', values=states)
+    returns = np.log(prices).diff()
+
+    long = returns.melt(ignore_index=False, var_name=['state', 'Year'], value_name='r').reset_index()
+    long = long.merge(df[['Quote Date', 'Year', 'position']], on=['Quote Date', 'Year'])
+    wide = long.pivot_table(index='Quote Date', columns=['position', 'state'], values='r')
+    wide = wide.reindex(columns=pd.MultiIndex.from_product([range(years), states])).dropna()
+
+    if lookback is not None:
+        wide = wide.iloc[-lookback:]
+    return wide.to_numpy()
+
+
+def return_covariance(returns: np.ndarray) -> np.ndarray:
+    """Sample covariance of daily log returns, (n, n)."""
+    if len(returns) < 2:
+        raise ValueError("At least two days of returns are needed to estimate volatility")
+    return np.cov(returns, rowvar=False)
+
+
+def _factor(cov: np.ndarray) -> np.ndarray:
+    # Cholesky when positive definite; otherwise a square root with the tiny
+    # negative eigenvalues from rounding clipped to zero
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+# ── Simulation ─────────────────────────────────────────────────────────────────
+
+def simulate_bulk_prices(
+    base_rates,
+    inputs: dict,
+    cov: np.ndarray,
+    n_paths: int = DEFAULT_PATHS,
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+    load_escalation=pricing.DEFAULT_LOAD_ESCALATION,
+    retail_escalation=pricing.DEFAULT_RETAIL_ESCALATION,
+    chunk_size: int = CHUNK_SIZE,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Average bulk price ($/kWh) per state for n_paths simulated curves.
+
+    base_rates is today's (years, states) settle block in $/MWh. Each path
+    moves the whole block by a correlated, zero-drift log-normal shock with
+    covariance cov * horizon_days, then prices it exactly like a quote:
+    escalated peak rates, unescalated off-peak, sidebar inputs.
+
+    Returns an array shaped (n_paths, states).
+    """
+    base   = np.asarray(base_rates, dtype=float)
+    factor = _factor(np.asarray(cov, dtype=float) * horizon_days)
+    drift  = -0.5 * np.diag(factor @ factor.T)     # keeps E[price] at today's curve
+    rng    = np.random.default_rng(seed)
+
+    prices = np.empty((n_paths, len(pricing.STATES)))
+    for start in range(0, n_paths, chunk_size):
+        n      = min(chunk_size, n_paths - start)
+        shocks = rng.standard_normal((n, factor.shape[0])) @ factor.T + drift
+        curves = base * np.exp(shocks).reshape((n,) + base.shape)
+
+        peak   = pricing.escalate(curves, load_escalation, retail_escalation)
+        result = pricing.calculate_bulk_prices(peak, curves / 10, **inputs)
+        prices[start:start + n] = pricing.bulk_price(result)
+    return prices
+
+
+def price_percentiles(prices: np.ndarray, percentiles=PERCENTILES) -> pd.DataFrame:
+    """
+    Percentiles of simulate_bulk_prices() output per state:
+
+        index: P5 | P50 | P95      columns: NSW | VIC | QLD | SA
+    """
+    values = np.percentile(prices, percentiles, axis=0)
+    return pd.DataFrame(values, index=[f'P{p}' for p in percentiles], columns=list(pricing.STATES))
@@ -0,0 +1,154 @@
+"""
+Summary Table Rendering
+=======================
+Cached, lightweight rendering of the HUM.py summary tables.
+
+    render_table(df, decimals, renderer)    draws one table
+    lazy_section(label, key, expanded)      collapsible section that only
+                                            renders its body while open
+    page_selector(total, page_size, key)    page picker for the paged
+                                            history tables on the tracker pages
+
+Three renderers share one look (yellow header, blue label column):
+
+    'HTML'         static HTML table; the default and the lightest payload
+    'Interactive'  st.dataframe, sortable and copyable
+    'Plotly'       the original go.Table figure
+
+Rendered output (HTML string or figure) is cached per process on a hash of
+the table contents and its format, so a rerun that does not change a table
+reuses its markup instead of rebuilding it. Collapsed sections send nothing
+to the browser at all.
+"""
+
+import hashlib
+import html
+
+import pandas as pd
+import streamlit as st
+
+import perf
+
+
+# ── Configuration ──────────────────────────────────────────────────────────────
+
+RENDERERS = ('HTML', 'Interactive', 'Plotly')
+
+HEADER_COLOUR = 'yellow'
+ACCENT_COLOUR = '#006FE7'
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def data_key(df: pd.DataFrame) -> str:
+    """Stable digest of a frame's values, index and column labels."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(repr(list(df.columns)).encode())
+    return digest.hexdigest()
+
+
+def _cell(value, decimals: int) -> str:
+    if isinstance(value, str):
+        return html.escape(value)
+    return f'{value:,.{decimals}f}'
+
+
+def lazy_section(label: str, key: str, expanded: bool = False) -> bool:
+    """
+    A toggle standing in for st.expander: returns True while open. Unlike an
+    expander, whatever the caller draws under a closed section is never
+    built or sent.
+    """
+    return st.toggle(label, value=expanded, key=key)
+
+
+def page_selector(total: int, page_size: int, key: str, unit: str = 'rows') -> int:
+    """
+    Page number input with a "rows 1–20 of 693" caption; returns the
+    zero-based page. A page left out of range by a narrower filter snaps back
+    to the last page.
+    """
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    page  = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=key)
+    first = (page - 1) * page_size
+    st.caption(f"{unit.capitalize()} {min(first + 1, total):,}–{min(first + page_size, total):,} of {total:,}")
+    return page - 1
+
+
+# ── Renderers ──────────────────────────────────────────────────────────────────
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _table_html(key: str, _df: pd.DataFrame, decimals: int, font_size: int, cell_height: int) -> str:
+    columns = list(_df.columns)
+    head = ''.join(
+        f'<th style="background:{HEADER_COLOUR}; color:{ACCENT_COLOUR}; font-size:18px; '
+        f'text-align:center; border:1px solid blue;">{html.escape(str(c))}</th>'
+        for c in columns
+    )
+    rows = []
+    for values in _df.itertuples(index=False, name=None):
+        label, *numbers = values
+        cells = [
+            f'<td style="background:{ACCENT_COLOUR}; color:{HEADER_COLOUR}; font-size:16px; '
+            f'text-align:center; border:1px solid {ACCENT_COLOUR};">{_cell(label, 0)}</td>'
+        ]
+        cells += [
+            f'<td style="color:{ACCENT_COLOUR}; font-size:{font_size}px; text-align:right; '
+            f'border:1px solid {ACCENT_COLOUR};">{_cell(v, decimals)}</td>'
+            for v in numbers
+        ]
+        rows.append(f'<tr style="height:{cell_height}px;">{"".join(cells)}</tr>')
+    return (f'<table style="width:100%; border-collapse:collapse;">'
+            f'<thead><tr style="height:{cell_height}px;">{head}</tr></thead>'
+            f'<tbody>{"".join(rows)}</tbody></table>')
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _table_figure(key: str, _df: pd.DataFrame, decimals: int, font_size: int, cell_height: int):
+    import plotly.graph_objects as go
+
+    formats    = []
+    alignments = []
+    for i, col in enumerate(_df.columns):
+        if pd.api.types.is_numeric_dtype(_df[col]):
+            formats.append(f',.{decimals}f' if i > 0 else '0')
+            alignments.append('right')
+        else:
+            formats.append('')
+            alignments.append('center' if i == 0 else 'right')
+    total_height = cell_height * (len(_df) + 1)
+    fig = go.Figure()
+    fig.add_trace(go.Table(
+        header=dict(values=list(_df.columns),
+                    font=dict(size=18, color=[ACCENT_COLOUR] * len(_df.columns)),
+                    fill_color=HEADER_COLOUR, height=cell_height,
+                    line=dict(width=1, color='blue'), align='center'),
+        cells=dict(values=_df.values.T,
+                   font=dict(size=[16] + [font_size], color=[HEADER_COLOUR] + [ACCENT_COLOUR] * (len(_df.columns) - 1)),
+                   fill_color=[ACCENT_COLOUR] + ['white'], height=cell_height,
+                   line=dict(width=1, color=ACCENT_COLOUR),
+                   format=formats, align=alignments),
+        columnwidth=[font_size] + [font_size / 3] * (len(_df.columns) - 1),
+    ))
+    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), height=total_height)
+    return fig
+
+
+def render_table(df: pd.DataFrame, decimals: int = 2, renderer: str = 'HTML',
+                 font_size: int = 16, cell_height: int = 35):
+    """Draws a summary table (label column first) with the chosen renderer."""
+    key = data_key(df)
+    if renderer == 'Interactive':
+        label = df.columns[0]
+        st.dataframe(
+            df.set_index(label),
+            column_config={c: st.column_config.NumberColumn(format=f'%,.{decimals}f') for c in df.columns[1:]},
+            use_container_width=True,
+        )
+    elif renderer == 'Plotly':
+        with perf.span('plotly.table'):
+            st.plotly_chart(_table_figure(key, df, decimals, font_size, cell_height), use_container_width=True)
+    else:
+        st.markdown(_table_html(key, df, decimals, font_size, cell_height), unsafe_allow_html=True)
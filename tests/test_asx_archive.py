@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import asx_archive
+import asx_standin
+
+
+@pytest.fixture
+def url():
+    server = asx_standin.serve()
+    yield f'http://127.0.0.1:{server.server_address[1]}/futures/au_electricity'
+    server.shutdown()
+
+
+def test_callers_keep_separate_state(url, tmp_path):
+    archive = str(tmp_path)
+    app_page = asx_archive.fetch_snapshot(url, archive, caller='hum')
+    asx_archive.record_fetch(url, app_page, archive, caller='hum')
+
+    # The app's fetch does not hide the page from the daily job
+    assert asx_archive.fetch_snapshot(url, archive).changed
+    assert not asx_archive.fetch_snapshot(url, archive, caller='hum').changed
+
+
+def test_state_is_only_saved_when_recorded(url, tmp_path):
+    archive = str(tmp_path)
+    page = asx_archive.fetch_snapshot(url, archive)
+
+    # Parse or write failed, nothing recorded: the next run sees it again
+    assert asx_archive.fetch_snapshot(url, archive).changed
+
+    asx_archive.record_fetch(url, page, archive)
+    again = asx_archive.fetch_snapshot(url, archive)
+    assert not again.changed and again.content == page.content
+
+
+def test_archive_keeps_fetch_order(tmp_path):
+    archive = str(tmp_path)
+    first, second = b'<html>first</html>', b'<html>second</html>'
+    at = [datetime(2026, 8, 21, hour, tzinfo=timezone.utc) for hour in (6, 7, 8)]
+    asx_archive.store(first, '2026-08-21', archive, at[0])
+    asx_archive.store(second, '2026-08-21', archive, at[1])
+    assert [asx_archive.read(p) for p in asx_archive.iter_archive(archive)] == [first, second]
+
+    # The first body comes back: it moves to the end rather than being duplicated
+    path, created = asx_archive.store(first, '2026-08-21', archive, at[2])
+    assert not created and path.endswith(f'20260821T080000Z-{asx_archive.content_hash(first)}.html.gz')
+    assert [asx_archive.read(p) for p in asx_archive.iter_archive(archive)] == [second, first]
+    assert asx_archive.store(first, '2026-08-21', archive) == (path, False)
@@ -0,0 +1,31 @@
+import os
+
+import asx_scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'asx')
+
+
+def soup_of(*parts):
+    with open(os.path.join(FIXTURES, *parts, 'au_electricity.html'), 'rb') as f:
+        return asx_scraper.make_soup(f.read())
+
+
+def test_every_card_maps_to_its_own_table():
+    tables = asx_scraper.index_contract_tables(soup_of())
+    assert len(tables) == 16
+    assert len({id(t) for t in tables.values()}) == 16
+    for code, table in tables.items():
+        titles = [row[-1] for row in asx_scraper.table_rows(table, with_titles=True)]
+        assert titles and all(title.startswith(code) for title in titles)
+
+
+def test_card_without_table_is_skipped_with_warning():
+    warnings = []
+    tables = asx_scraper.index_contract_tables(soup_of('missing_table'), warnings.append)
+
+    assert 'HX' not in tables
+    assert len(warnings) == 1 and 'HX' in warnings[0]
+    # The following card keeps its own table
+    assert tables.keys() == asx_scraper.index_contract_tables(soup_of()).keys()
+    prices = asx_scraper.extract_base_strip_prices(tables)
+    assert prices == asx_scraper.extract_base_strip_prices(asx_scraper.index_contract_tables(soup_of()))
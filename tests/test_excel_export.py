@@ -0,0 +1,34 @@
+import io
+import re
+import zipfile
+from datetime import date
+
+import pandas as pd
+
+import excel_export
+
+
+def number_format(data: bytes, cell: str) -> str:
+    """Format code of one cell on the first sheet, read from the xlsx XML."""
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        sheet  = z.read('xl/worksheets/sheet1.xml').decode()
+        styles = z.read('xl/styles.xml').decode()
+    style  = re.search(rf'<c r="{cell}"(?: s="(\d+)")?', sheet).group(1)
+    if style is None:
+        return 'General'
+    xfs    = re.search(r'<cellXfs[^>]*>(.*?)</cellXfs>', styles, re.DOTALL).group(1)
+    fmt_id = re.findall(r'<xf [^>]*numFmtId="(\d+)"', xfs)[int(style)]
+    custom = dict(re.findall(r'<numFmt numFmtId="(\d+)" formatCode="([^"]*)"', styles))
+    return custom.get(fmt_id, fmt_id)
+
+
+def test_dates_are_formatted():
+    df = pd.DataFrame(
+        {'NSW': [80.29, 81.5], 'Stamp': pd.to_datetime(['2026-08-20', '2026-08-21'])},
+        index=pd.Index([date(2026, 8, 20), date(2026, 8, 21)], name='Quote Date'),
+    )
+    data = excel_export.write_workbook([('History', df, True)])
+
+    assert number_format(data, 'A2') == 'yyyy-mm-dd'     # datetime.date index
+    assert number_format(data, 'C2') == 'yyyy-mm-dd'     # Timestamp column
+    assert number_format(data, 'B2') == 'General'
@@ -0,0 +1,186 @@
+import sqlite3
+
+import pandas as pd
+
+import futures_db
+
+
+def futures_rows(days):
+    return pd.DataFrame([
+        {'Quote Date': day, 'Year': year, 'NSW': 80.0 + i + year % 10,
+         'VIC': 60.0 + i, 'QLD': 75.0 + i, 'SA': 90.0 + i}
+        for i, day in enumerate(days)
+        for year in (2027, 2028, 2029)
+    ])
+
+
+def store(db_path, days):
+    conn = futures_db.connect(db_path)
+    try:
+        futures_db.upsert_futures_rows(conn, futures_rows(days))
+    finally:
+        conn.close()
+
+
+def read_index(index_db_path):
+    conn = sqlite3.connect(index_db_path)
+    try:
+        return pd.read_sql_query('SELECT * FROM bulk_price_index ORDER BY "Quote Date"', conn)
+    finally:
+        conn.close()
+
+
+def test_incremental_index_picks_up_backfilled_dates(tmp_path):
+    db, index_db, full_db = (str(tmp_path / name) for name in ('f.db', 'i.db', 'full.db'))
+    store(db, ['2026-08-17', '2026-08-18', '2026-08-19'])
+    futures_db.materialize_bulk_price_index(db, index_db)
+
+    # An import or archive replay adds dates older than the last indexed one
+    store(db, ['2026-08-10', '2026-08-12'])
+    futures_db.mark_index_stale('2026-08-12', index_db)
+    futures_db.mark_index_stale('2026-08-10', index_db)
+    futures_db.mark_index_stale('2026-08-11', index_db)     # the earlier mark is kept
+    futures_db.materialize_bulk_price_index(db, index_db)
+
+    futures_db.materialize_bulk_price_index(db, full_db, incremental=False)
+    incremental, full = read_index(index_db), read_index(full_db)
+    assert len(full) == 5
+    pd.testing.assert_frame_equal(incremental, full)
+
+
+def test_stale_mark_is_cleared_once_materialised(tmp_path):
+    db, index_db = str(tmp_path / 'f.db'), str(tmp_path / 'i.db')
+    store(db, ['2026-08-17', '2026-08-18', '2026-08-19'])
+    futures_db.materialize_bulk_price_index(db, index_db)
+
+    futures_db.mark_index_stale('2026-08-17', index_db)
+    assert futures_db.materialize_bulk_price_index(db, index_db) == 3
+    # Back to recomputing only the last indexed date
+    assert futures_db.materialize_bulk_price_index(db, index_db) == 1
+
+
+def test_upsert_reports_inserted_rows_without_a_read(tmp_path):
+    conn = futures_db.connect(str(tmp_path / 'f.db'))
+    try:
+        first = futures_rows(['2026-08-20'])
+        assert futures_db.upsert_futures_rows(conn, first).tolist() == [True] * 3
+
+        again = futures_rows(['2026-08-20', '2026-08-21'])
+        again.loc[again['Year'] == 2027, 'NSW'] += 5
+        assert futures_db.upsert_futures_rows(conn, again).tolist() == [False] * 3 + [True] * 3
+        stored = futures_db.load_curve(str(tmp_path / 'f.db'), '2026-08-20')
+        assert stored.loc[stored['Year'] == 2027, 'NSW'].item() == first.loc[0, 'NSW']
+
+        # replace overwrites stored settles, the last row for a key winning
+        revised = pd.concat([again, again.assign(NSW=again['NSW'] + 1)], ignore_index=True)
+        added = futures_db.upsert_futures_rows(conn, revised, replace=True)
+        assert not added.any() and list(added.index) == list(revised.index)
+        stored = futures_db.load_curve(str(tmp_path / 'f.db'), '2026-08-20')
+        assert stored.loc[stored['Year'] == 2027, 'NSW'].item() == first.loc[0, 'NSW'] + 6
+    finally:
+        conn.close()
+
+
+def legacy_db(db_path, rows):
+    # futures_data as update_db.py created it before futures_curve existed
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE futures_data (
+            "Quote Date" TEXT,
+            "Year"       INTEGER,
+            "NSW"        REAL,
+            "QLD"        REAL,
+            "SA"         REAL,
+            "VIC"        REAL,
+            PRIMARY KEY ("Quote Date", "Year")
+        )
+    ''')
+    rows.to_sql('futures_data', conn, if_exists='append', index=False)
+    conn.commit()
+    conn.close()
+
+
+def read_view(conn):
+    return pd.read_sql_query(
+        'SELECT "Quote Date", "Year", NSW, QLD, SA, VIC FROM futures_data ORDER BY "Quote Date", "Year"', conn
+    )
+
+
+def test_migration_keeps_every_row_of_the_wide_table(tmp_path):
+    db = str(tmp_path / 'legacy.db')
+    rows = futures_rows(['2026-08-19', '2026-08-20', '2026-08-21'])[futures_db.FUTURES_COLUMNS]
+    legacy_db(db, rows)
+
+    conn = futures_db.connect(db)
+    try:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == futures_db.SCHEMA_VERSION
+        assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'futures_data'").fetchone()[0] == 'view'
+        assert conn.execute('SELECT COUNT(*) FROM futures_curve').fetchone()[0] == len(rows) * 4
+        expected = rows[['Quote Date', 'Year', 'NSW', 'QLD', 'SA', 'VIC']].reset_index(drop=True)
+        pd.testing.assert_frame_equal(read_view(conn), expected, check_dtype=False)
+    finally:
+        conn.close()
+
+
+def test_migration_runs_once(tmp_path):
+    db = str(tmp_path / 'legacy.db')
+    legacy_db(db, futures_rows(['2026-08-20', '2026-08-21'])[futures_db.FUTURES_COLUMNS])
+
+    conn = futures_db.connect(db)
+    try:
+        before = read_view(conn)
+        futures_db.ensure_schema(conn)
+        futures_db.ensure_schema(conn)
+        pd.testing.assert_frame_equal(read_view(conn), before)
+        assert conn.execute('SELECT COUNT(*) FROM futures_curve').fetchone()[0] == 6 * 4
+    finally:
+        conn.close()
+
+    # Reopening an already migrated file is a no-op too
+    conn = futures_db.connect(db)
+    try:
+        pd.testing.assert_frame_equal(read_view(conn), before)
+    finally:
+        conn.close()
+
+
+def test_view_drops_periods_missing_a_state(tmp_path):
+    db = str(tmp_path / 'legacy.db')
+    rows = futures_rows(['2026-08-20', '2026-08-21'])[futures_db.FUTURES_COLUMNS]
+    rows.loc[rows['Quote Date'] == '2026-08-21', 'SA'] = None     # a whole day without SA
+    rows.loc[0, 'QLD'] = None                                     # one period without QLD
+    legacy_db(db, rows)
+
+    conn = futures_db.connect(db)
+    try:
+        view = read_view(conn)
+        # The incomplete rows are still stored, per state, in futures_curve
+        assert conn.execute('SELECT COUNT(*) FROM futures_curve').fetchone()[0] == 6 * 4 - 4
+    finally:
+        conn.close()
+    assert list(zip(view['Quote Date'], view['Year'])) == [('2026-08-20', 2028), ('2026-08-20', 2029)]
+
+
+def test_pages_only_count_days_with_a_complete_fy_curve(tmp_path):
+    db = str(tmp_path / 'f.db')
+    store(db, ['2026-08-17', '2026-08-19', '2026-08-21'])
+    conn = futures_db.connect(db)
+    try:
+        contracts = pd.DataFrame([
+            # a day with quarterly Base Strip contracts only
+            *({'Quote Date': '2026-08-20', 'product': 'H', 'region': s, 'period': 'Q3 2026', 'settle': 90.0}
+              for s in ('NSW', 'VIC', 'QLD', 'SA')),
+            # a day whose FY curve has no SA
+            *({'Quote Date': '2026-08-18', 'product': 'H', 'region': s, 'period': 'FY27', 'settle': 80.0}
+              for s in ('NSW', 'VIC', 'QLD')),
+        ]).reindex(columns=futures_db.CONTRACT_COLUMNS)
+        futures_db.upsert_contract_rows(conn, contracts)
+    finally:
+        conn.close()
+
+    assert futures_db.count_quote_days(db) == 3
+    pages = [futures_db.load_futures_page(db, page=n, page_size=2) for n in range(2)]
+    assert [sorted(set(p['Quote Date']), reverse=True) for p in pages] == [
+        ['2026-08-21', '2026-08-19'], ['2026-08-17']]
+    assert futures_db.count_quote_days(db, periods=['FY28']) == 3
+    assert futures_db.load_futures_page(db, periods=['FY28'], page_size=2)['Year'].tolist() == [2028, 2028]
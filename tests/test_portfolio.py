@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+import portfolio
+import pricing
+
+CURVE = pd.DataFrame({
+    'Year': [2027, 2028, 2029],
+    'NSW':  [80.29, 84.73, 92.91],
+    'VIC':  [57.43, 61.02, 70.15],
+    'QLD':  [75.10, 79.64, 85.30],
+    'SA':   [88.50, 90.12, 96.47],
+})
+
+
+def test_float_off_peak_column_with_nans():
+    sites = pd.DataFrame({
+        'total_consumption':    [1e6, 2e6, 3e6],
+        'peak_consumption':     [40.0, 50.0, 60.0],
+        'shoulder_consumption': [10.0, 10.0, 10.0],
+        'off_peak_consumption': [50.0, np.nan, np.nan],
+    })
+    before = sites.copy()
+
+    prices = portfolio.price_portfolio(sites, curve=CURVE)
+
+    # The caller's frame is left alone
+    pd.testing.assert_frame_equal(sites, before)
+
+    filled = sites.assign(off_peak_consumption=[50.0, 40.0, 30.0])
+    pd.testing.assert_frame_equal(prices, portfolio.price_portfolio(filled, curve=CURVE))
+    assert list(prices.columns) == list(pricing.STATES)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import pricing
+
+# FY27-FY29 settles ($/MWh) from fixtures/asx/au_electricity.html, NSW | VIC | QLD | SA
+CURVE = np.array([
+    [80.29, 57.43, 70.03, 72.92],
+    [83.70, 63.70, 74.40, 84.58],
+    [91.49, 79.04, 76.84, 96.50],
+])
+
+QUOTE = dict(pricing.DEFAULT_INPUTS, off_peak_consumption=50.0)
+
+
+def scalar_rates(peak_rate, off_peak_rate, q):
+    # The per-year loop HUM.calculate_bulk_prices ran before the engine
+    net_loss_factor = 1.00860 * 1.04344
+    total           = q['total_consumption']
+    peak_demand     = total / 8760 / q['load_factor']
+    other_volume    = (q['aemo_participant_charge'] + q['aemo_ancillary_services_charge']
+                       + q['srec_charge'] + q['lrec_charge'])
+    fixed           = q['service_availability_charge'] + (
+        (q['metering_charge'] + q['retail_service_charge'] + q['admin_charge']) / 30)
+
+    energy_costs = (total * q['peak_consumption'] / 100 * peak_rate * net_loss_factor / 100
+                    + total * q['shoulder_consumption'] / 100 * peak_rate * net_loss_factor / 100
+                    + total * q['off_peak_consumption'] / 100 * off_peak_rate * net_loss_factor / 100)
+    network_costs = peak_demand * q['nuos_charge'] * 12 + total * q['peak_charge'] / 100
+    other_costs   = total * other_volume / 100
+    fixed_costs   = fixed * 365
+    return [c / total for c in (energy_costs, network_costs, other_costs, fixed_costs)]
+
+
+def engine_rates(curve):
+    base = pricing.term_matrix(curve)
+    return pricing.calculate_bulk_prices(pricing.escalate(base), base / 10, **QUOTE)
+
+
+@pytest.mark.parametrize('available', [3, 2, 1])
+def test_engine_matches_the_scalar_formulas(available):
+    result = engine_rates(CURVE[:available])
+    for s, state in enumerate(pricing.STATES):
+        for year in range(pricing.CONTRACT_YEARS):
+            # Years past the last available row reuse it
+            row  = min(year, available - 1)
+            peak = round(CURVE[row, s] / 10 * 1.15 * 1.15, 2)
+            expected = scalar_rates(peak, CURVE[row, s] / 10, QUOTE)
+            rates = result['rates'][:, year, s]
+            np.testing.assert_allclose(rates[:4], expected, rtol=1e-12, err_msg=f'{state} year {year + 1}')
+            assert rates[pricing.TOTAL_RATE_ROW] == pytest.approx(sum(expected), rel=1e-12)
+
+
+def test_pinned_quotes():
+    # NSW year 1 by hand: peak 10.62 c/kWh, off-peak 8.029 c/kWh, Energex 8300
+    assert engine_rates(CURVE)['rates'][pricing.TOTAL_RATE_ROW, 0, 0] == pytest.approx(0.19269021, abs=1e-8)
+    np.testing.assert_allclose(pricing.bulk_price(engine_rates(CURVE)),
+                               [0.1986381, 0.17609716, 0.18469187, 0.1980277], atol=1e-8)
+    # Two rows: year 3 is priced off FY28 again
+    np.testing.assert_allclose(pricing.bulk_price(engine_rates(CURVE[:2])),
+                               [0.19546508, 0.16984582, 0.1837026, 0.19318309], atol=1e-8)
+    assert pricing.term_matrix(CURVE[:2])[2].tolist() == CURVE[1].tolist()
+
+
+def test_empty_curve_is_rejected():
+    with pytest.raises(ValueError):
+        pricing.term_matrix(CURVE[:0])
@@ -0,0 +1,82 @@
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import asx_archive
+import futures_db
+import update_db
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'fixtures', 'asx', 'au_electricity.html')
+
+HEADER = 'Quote Date,Year,NSW,QLD,SA,VIC\n'
+
+
+def rows(*keys):
+    return pd.DataFrame([
+        {'Quote Date': day, 'Year': year, 'NSW': price, 'VIC': 1.0, 'QLD': 2.0, 'SA': 3.0}
+        for day, year, price in keys
+    ])
+
+
+def test_csv_rows_are_appended(tmp_path):
+    csv = tmp_path / 'history.csv'
+    stored = (HEADER
+              + '2026-08-20,2028,80.0,2.0,3.0,1.0\n'
+              + '2026-08-20,2027,79.0,2.0,3.0,1.0\n'
+              + '2026-08-19,2027,78.0,2.0,3.0,1.0')          # no trailing newline
+    csv.write_text(stored)
+
+    new = rows(('2026-08-21', 2028, 82.0), ('2026-08-21', 2027, 81.0))
+    assert update_db.update_csv_file(new, str(csv))
+
+    text = csv.read_text()
+    assert text.startswith(stored + '\n')
+    df = pd.read_csv(csv)
+    assert list(df.columns) == HEADER.strip().split(',')
+    assert list(zip(df['Quote Date'], df['Year']))[3:] == [('2026-08-21', 2027), ('2026-08-21', 2028)]
+    assert df.loc[4, 'NSW'] == 82.0 and df.loc[4, 'VIC'] == 1.0
+
+
+def test_csv_is_created_when_missing(tmp_path):
+    csv = tmp_path / 'new' / 'history.csv'
+    assert update_db.update_csv_file(rows(('2026-08-21', 2027, 81.0)), str(csv))
+    assert len(pd.read_csv(csv)) == 1
+
+
+def test_import_marks_the_index_stale(tmp_path):
+    db, index_db = str(tmp_path / 'f.db'), str(tmp_path / 'i.db')
+    csv = tmp_path / 'backfill.csv'
+    rows(('2026-08-20', 2027, 80.0), ('2026-08-21', 2027, 81.0)).to_csv(csv, index=False)
+    update_db.import_files([str(csv)], db, update_db.TABLE_NAME, index_db_file=index_db)
+    futures_db.materialize_bulk_price_index(db, index_db)
+
+    older = tmp_path / 'older.csv'
+    rows(('2026-08-14', 2027, 78.0)).to_csv(older, index=False)
+    update_db.import_files([str(older)], db, update_db.TABLE_NAME, index_db_file=index_db)
+    futures_db.materialize_bulk_price_index(db, index_db)
+
+    df = futures_db.load_bulk_price_index(index_db)
+    assert list(df['Quote Date']) == ['2026-08-14', '2026-08-20', '2026-08-21']
+
+
+def test_replay_applies_the_last_fetched_page_of_a_date(tmp_path):
+    with open(FIXTURE, 'rb') as f:
+        page = f.read()
+    revised = page.replace(b'<td>80.29</td></tr>', b'<td>81.00</td></tr>')
+    # Fetch the page whose hash sorts first last, so hash order would get it wrong
+    earlier, later = sorted([page, revised], key=asx_archive.content_hash, reverse=True)
+    archive = str(tmp_path / 'archive')
+    for hour, body in ((6, earlier), (7, later)):
+        asx_archive.store(body, '2026-08-21', archive, datetime(2026, 8, 21, hour, tzinfo=timezone.utc))
+
+    db = str(tmp_path / 'f.db')
+    update_db.replay_archive([archive], db, update_db.TABLE_NAME, workers=1,
+                             index_db_file=str(tmp_path / 'i.db'))
+
+    expected = 81.0 if later is revised else 80.29
+    fy = futures_db.load_curve(db, '2026-08-21')
+    assert fy.loc[fy['Year'] == 2027, 'NSW'].item() == expected
+    contract = futures_db.load_contract_history(db, 'H', 'NSW', 'FY27')
+    assert contract['settle'].tolist() == [expected]
@@ -5,26 +5,54 @@
 ASX Futures Data Updater — Refactored for new ASX Energy site structure
 =======================================================================
 Targets : https://www.asxenergy.com.au/futures/au_electricity
-Extracts: FY (Financial Year) Base Strip settle prices for NSW, VIC, QLD, SA
+Extracts: FY (Financial Year) Base Strip settle prices for NSW, VIC, QLD, SA,
+          plus every product / region / period row on the page (long format)
 
 Changes from previous version:
   - New URL: /futures/au_electricity (homepage no longer carries price table)
   - Date parsed from #refresh-container-market_date <pre> widget
-  - Tables located via contract-btn[data-code] attribute (HN/HV/HQ/HS)
+  - Tables located via contract-btn[data-code] attribute (HN/HV/HQ/HS),
+    indexed in a single pass by asx_scraper (lxml parser when installed)
   - FY rows identified by "FY" prefix in period label (e.g. FY27, FY28, FY29)
   - Three FY data points per state (vs two CY), matching original data volume
   - Weekend guard: exits cleanly if market date falls on Saturday or Sunday
+  - All products (Base / Peak / Cap, CY / FY / quarterly) from the same
+    response stored in futures_curve, keyed by (product, region, period,
+    quote day); futures_data is now a view over its FY Base Strip rows
+
+Usage:
+  python update_db.py                      daily scrape (GitHub Action)
+  python update_db.py daily --force        …even if the page is unchanged
+  python update_db.py import FILE [FILE…]  backfill from CSV / archived pages
+  python update_db.py replay [ARCHIVE…]    re-parse archive/asx in parallel
 """
 
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-from datetime import datetime, date
+from datetime import date
+import argparse
+import contextlib
+import gzip
+import io
 import sqlite3
 import os
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
+import asx_archive
+from asx_scraper import (
+    ASX_URL,
+    extract_base_strip_prices, extract_contract_rows, extract_fy_prices,
+    index_contract_tables, make_soup, parse_market_date,
+)
+from futures_db import (
+    CONTRACT_COLUMNS, CURVE_TABLE_NAME, FUTURES_COLUMNS, INDEX_DB_FILE_PATH,
+    connect, date_text, mark_index_stale,
+    upsert_contract_rows, upsert_futures_rows,
+)
+
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 
@@ -33,29 +61,13 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 CSV_FILE_PATH = '_old/historical-futures-data.csv'
 DB_FILE_PATH  = 'futures_prices.db'
 TABLE_NAME    = 'futures_data'
-ASX_URL       = 'https://www.asxenergy.com.au/futures/au_electricity'
-
-# H = Base Strip product; suffix = state code
-BASE_STRIP_CODES = {
-    'HN': 'NSW',
-    'HV': 'VIC',
-    'HQ': 'QLD',
-    'HS': 'SA',
-}
-
-REQUEST_HEADERS = {
-    'User-Agent': (
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-        'AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
-    )
-}
 
 
 # ── Database helpers ───────────────────────────────────────────────────────────
 
 def create_db_connection(db_file: str):
     try:
-        conn = sqlite3.connect(db_file)
+        conn = connect(db_file)     # migrates older wide-table databases
         print(f"✓ Connected: {db_file}")
         return conn
     except sqlite3.Error as e:
@@ -67,21 +79,9 @@ def setup_database_schema(db_file: str, table_name: str):
     conn = create_db_connection(db_file)
     if conn is None:
         return
-    cursor = conn.cursor()
-    cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            "Quote Date" TEXT,
-            "Year"       INTEGER,
-            "NSW"        REAL,
-            "QLD"        REAL,
-            "SA"         REAL,
-            "VIC"        REAL,
-            PRIMARY KEY ("Quote Date", "Year")
-        )
-    ''')
-    conn.commit()
+    # connect() has already created / migrated the schema
     conn.close()
-    print(f"✓ Schema verified: {table_name}")
+    print(f"✓ Schema verified: {CURVE_TABLE_NAME}, {table_name} (view)")
 
 
 # ── Scraping ───────────────────────────────────────────────────────────────────
@@ -96,24 +96,9 @@ def parse_quote_date(soup: BeautifulSoup) -> Optional[date]:
       - The date element cannot be found / parsed
       - The parsed date falls on a weekend (ASX does not trade Sat/Sun)
     """
-    container = soup.find(id='refresh-container-market_date')
-    if not container:
-        print("✗ Could not find market date container")
-        return None
-
-    pre = container.find('pre')
-    if not pre:
-        print("✗ Could not find date <pre> tag")
-        return None
-
-    # Strip non-breaking spaces and grab the first line only
-    raw        = pre.get_text()
-    first_line = raw.split('\n')[0].replace('\xa0', '').replace('\u00a0', '').strip()
-
-    try:
-        parsed = datetime.strptime(first_line, '%a %d %b %Y').date()
-    except ValueError as e:
-        print(f"✗ Date parse failed for '{first_line}': {e}")
+    parsed = parse_market_date(soup)
+    if parsed is None:
+        print("✗ Could not find or parse the market date")
         return None
 
     # Weekend guard — return None so the caller exits without touching the DB
@@ -125,6 +110,10 @@ def parse_quote_date(soup: BeautifulSoup) -> Optional[date]:
     return parsed
 
 
+def _warn(message: str):
+    print(f"  ⚠  {message}")
+
+
 def extract_fy_prices_for_state(soup: BeautifulSoup, data_code: str, state: str) -> dict:
     """
     Locates the Base Strip table for a given data-code and returns
@@ -134,204 +123,385 @@ def extract_fy_prices_for_state(soup: BeautifulSoup, data_code: str, state: str)
     attributes like "HNM2027" (M = July = FY start month). Three FY rows are
     consistently available for all four states, giving 3 data points per scrape.
 
-    Strategy:
-      1. Find the unique contract-btn button with the matching data-code.
-      2. Walk up to the outer shadow-md card wrapper div.
-      3. Find the sibling data-table-container → table.
-      4. Iterate tbody rows, skip any that do not start with "FY".
-      5. Parse year from label (FY27 → 2027) and settle from column index 6.
+    Convenience wrapper for a single table; parse_asx_snapshot() indexes every
+    table once and reads all states from that index instead.
 
     Returns: {2027: 83.24, 2028: 84.73, 2029: 92.91, ...}
     """
-    prices = {}
-
-    btn = soup.find('button', class_='contract-btn', attrs={'data-code': data_code})
-    if not btn:
-        print(f"  ✗ No contract-btn found for data-code='{data_code}' ({state})")
-        return prices
-
-    outer = btn.find_parent(
-        'div',
-        class_=lambda c: c and 'shadow-md' in (c if isinstance(c, str) else ' '.join(c))
-    )
-    if not outer:
-        print(f"  ✗ Could not find outer wrapper for {data_code} ({state})")
-        return prices
-
-    container = outer.find('div', class_='data-table-container')
-    if not container:
-        print(f"  ✗ No data-table-container for {data_code} ({state})")
-        return prices
-
-    table = container.find('table')
-    tbody = table.find('tbody') if table else None
-    if not tbody:
-        print(f"  ✗ No table/tbody for {data_code} ({state})")
-        return prices
-
-    # Table columns: Period | Bid | Ask | Last | +/- | Vol | Settle (index 6)
-    for row in tbody.find_all('tr'):
-        cells = row.find_all('td')
-        if len(cells) < 7:
-            continue
+    table = index_contract_tables(soup, _warn).get(data_code)
+    if table is None:
+        print(f"  ✗ No contract table found for data-code='{data_code}' ({state})")
+        return {}
+    return extract_fy_prices(table, state, _warn)
 
-        label = cells[0].get_text(strip=True)   # e.g. "CY27", "FY27", "FY29"
 
-        # Only Financial Year strips — skip CY and any other contract types
-        if not label.startswith('FY'):
-            continue
+def parse_asx_snapshot(content) -> Optional[tuple]:
+    """
+    Parses a raw AU Electricity futures page (live response body or archived
+    copy) once and returns (futures, contracts):
 
-        try:
-            year = int('20' + label[2:])         # FY27 → 2027, FY28 → 2028, FY29 → 2029
-        except (ValueError, IndexError):
-            print(f"  ⚠  Could not parse year from label '{label}'")
-            continue
+      futures   : FY Base Strip rows matching the futures_data schema,
+                  Quote Date | Year | NSW | QLD | SA | VIC, or None when no
+                  year carries a settle price for all four states
+      contracts : every product / region / period row on the page in long
+                  format (futures_db.CONTRACT_COLUMNS)
 
-        settle_text = cells[6].get_text(strip=True)
-        if settle_text == '-' or not settle_text:
-            print(f"  ⚠  No settle price for {state} {label} — skipping")
-            continue
+    Returns None when the page cannot be parsed or the market is closed (weekend).
+    """
+    soup = make_soup(content)
 
-        try:
-            prices[year] = round(float(settle_text), 2)
-            print(f"  ✓ {state} {label} ({year}): {prices[year]}")
-        except ValueError:
-            print(f"  ⚠  Could not parse price '{settle_text}' for {state} {label}")
+    # Date — also enforces the weekend guard
+    quote_date = parse_quote_date(soup)
+    if quote_date is None:
+        return None
 
-    return prices
+    # One pass indexes every contract table; all products read from it
+    tables = index_contract_tables(soup, _warn)
 
+    contracts = pd.DataFrame(extract_contract_rows(tables), columns=CONTRACT_COLUMNS[1:])
+    contracts.insert(0, 'Quote Date', quote_date)
+    print(f"✓ {len(contracts)} contract rows across {len(tables)} tables")
 
-def scrape_asx_futures_data(url: str) -> Optional[pd.DataFrame]:
-    """
-    Fetches the AU Electricity futures page and returns a DataFrame that
-    matches the existing DB schema:
+    prices_by_year = extract_base_strip_prices(tables, _warn)
+    for year in sorted(prices_by_year):
+        print(f"  ✓ FY{str(year)[2:]} ({year}): {prices_by_year[year]}")
+
+    if not prices_by_year:
+        print("✗ No price data extracted")
+        return None, contracts
+
+    # Build rows, dropping any year that is missing one or more states
+    rows = []
+    for year in sorted(prices_by_year):
+        sd      = prices_by_year[year]
+        missing = [s for s in ('NSW', 'VIC', 'QLD', 'SA') if s not in sd]
+        if missing:
+            print(f"\n  ⚠  Year {year} missing {missing} — row skipped")
+            continue
+        rows.append({
+            'Quote Date': quote_date,
+            'Year': year,
+            'NSW':  sd['NSW'],
+            'QLD':  sd['QLD'],
+            'SA':   sd['SA'],
+            'VIC':  sd['VIC'],
+        })
+
+    if not rows:
+        print("✗ No complete year/state rows to save")
+        return None, contracts
 
-        Quote Date | Year | NSW | QLD | SA | VIC
+    df = pd.DataFrame(rows)
+    print(f"\n✓ Scraped {len(df)} records for {quote_date}")
+    return df, contracts
 
-    Returns None on any failure or when the market is closed (weekend).
-    Only rows where all four states carry a settle price are included.
+
+def scrape_asx_snapshot(url: str, force: bool = False) -> tuple:
+    """
+    Conditionally fetches the AU Electricity futures page (the body is
+    archived under archive/asx) and parses it with parse_asx_snapshot().
+
+    Returns (page, parsed). page is None when the fetch failed; parsed is
+    None on any failure, when the market is closed (weekend), or when the
+    page is unchanged since the job last stored it, unless force is set.
+    The caller records the fetch with asx_archive.record_fetch() once the
+    parsed rows are written.
     """
+    print(f"📡 Fetching: {url}")
+    page = asx_archive.fetch_snapshot(url, warn=_warn)
+    if page is None:
+        print("✗ HTTP error: no usable response from ASX")
+        return None, None
+    print(f"✓ Archived: {page.path}")
+    if not page.changed and not force:
+        print(f"✓ Page unchanged since last stored (market date {page.market_date}) — skipping parse")
+        return page, None
     try:
-        print(f"📡 Fetching: {url}")
-        response = requests.get(url, headers=REQUEST_HEADERS, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Date — also enforces the weekend guard
-        quote_date = parse_quote_date(soup)
-        if quote_date is None:
-            return None
-
-        # Collect prices per year across all four states
-        prices_by_year: dict = {}
-        for code, state in BASE_STRIP_CODES.items():
-            print(f"\n  [{state}] Base Strip FY rows (data-code='{code}')")
-            for year, price in extract_fy_prices_for_state(soup, code, state).items():
-                prices_by_year.setdefault(year, {})[state] = price
-
-        if not prices_by_year:
-            print("✗ No price data extracted")
-            return None
-
-        # Build rows, dropping any year that is missing one or more states
-        rows = []
-        for year in sorted(prices_by_year):
-            sd      = prices_by_year[year]
-            missing = [s for s in ('NSW', 'VIC', 'QLD', 'SA') if s not in sd]
-            if missing:
-                print(f"\n  ⚠  Year {year} missing {missing} — row skipped")
-                continue
-            rows.append({
-                'Quote Date': quote_date,
-                'Year': year,
-                'NSW':  sd['NSW'],
-                'QLD':  sd['QLD'],
-                'SA':   sd['SA'],
-                'VIC':  sd['VIC'],
-            })
-
-        if not rows:
-            print("✗ No complete year/state rows to save")
-            return None
-
-        df = pd.DataFrame(rows)
-        print(f"\n✓ Scraped {len(df)} records for {quote_date}")
-        return df
-
-    except requests.RequestException as e:
-        print(f"✗ HTTP error: {e}")
-        return None
+        return page, parse_asx_snapshot(page.content)
     except Exception as e:
         print(f"✗ Unexpected error during scrape: {e}")
         import traceback
         traceback.print_exc()
-        return None
+        return page, None
 
 
 # ── Persistence ────────────────────────────────────────────────────────────────
 
-def update_csv_file(new_data: pd.DataFrame, csv_file: str):
-    """Append new records to the CSV file, deduplicating on Quote Date + Year."""
+def update_csv_file(new_data: pd.DataFrame, csv_file: str) -> bool:
+    """
+    Appends new records to the CSV file; False on failure.
+
+    The file is append-ordered: each run adds its rows at the end (oldest
+    Quote Date and Year first) without reading or rewriting the rows already
+    there, so readers should sort on Quote Date. The history imported before
+    appending began is newest-first. The daily job only passes rows that
+    update_database() actually inserted, which keeps one row per Quote Date
+    + Year. Columns follow the existing header when the file already exists.
+    """
     try:
         if os.path.dirname(csv_file):
             os.makedirs(os.path.dirname(csv_file), exist_ok=True)
 
-        if os.path.exists(csv_file):
-            existing = pd.read_csv(csv_file)
-            existing['Quote Date'] = pd.to_datetime(existing['Quote Date']).dt.date
-            combined = pd.concat([existing, new_data], ignore_index=True)
-            combined = combined.drop_duplicates(subset=['Quote Date', 'Year'], keep='last')
-        else:
-            combined = new_data.copy()
+        rows = new_data.copy()
+        rows['Quote Date'] = pd.to_datetime(rows['Quote Date']).dt.strftime('%Y-%m-%d')
+        rows = (rows.drop_duplicates(['Quote Date', 'Year'], keep='last')
+                    .sort_values(['Quote Date', 'Year']))
 
-        combined = combined.sort_values('Quote Date', ascending=False)
-        combined['Quote Date'] = pd.to_datetime(combined['Quote Date']).dt.strftime('%Y-%m-%d')
-        combined.to_csv(csv_file, index=False)
-        print(f"✓ CSV updated: {csv_file}")
+        if not (os.path.exists(csv_file) and os.path.getsize(csv_file) > 0):
+            rows.to_csv(csv_file, index=False)
+        else:
+            with open(csv_file, 'rb') as f:
+                header = f.readline().decode().strip().split(',')
+                f.seek(-1, os.SEEK_END)
+                newline = f.read(1) == b'\n'
+            with open(csv_file, 'a', newline='') as f:
+                if not newline:
+                    f.write('\n')
+                rows[header].to_csv(f, header=False, index=False)
+
+        print(f"✓ CSV updated: {csv_file} (+{len(rows)} rows)")
+        return True
 
     except Exception as e:
         print(f"✗ CSV update error: {e}")
+        return False
 
 
-def update_database(new_data: pd.DataFrame, db_file: str, table_name: str):
-    """Insert new rows into the database, skipping any that already exist."""
+def update_database(new_data: pd.DataFrame, db_file: str, table_name: str) -> Optional[pd.DataFrame]:
+    """
+    Insert new rows into the database in one transaction, skipping any that
+    already exist. Returns the rows that were actually inserted, or None if
+    the database could not be updated.
+    """
     conn = create_db_connection(db_file)
     if conn is None:
-        return
+        return None
     try:
-        cursor   = conn.cursor()
-        inserted = 0
-        skipped  = 0
-
-        for _, row in new_data.iterrows():
-            qd   = row['Quote Date']
-            qd_s = qd.strftime('%Y-%m-%d') if hasattr(qd, 'strftime') else str(qd)
-            yr   = int(row['Year'])
-
-            cursor.execute(
-                f'SELECT COUNT(*) FROM {table_name} WHERE "Quote Date"=? AND "Year"=?',
-                (qd_s, yr)
-            )
-            if cursor.fetchone()[0] == 0:
-                cursor.execute(
-                    f'INSERT INTO {table_name} ("Quote Date","Year","NSW","QLD","SA","VIC") '
-                    f'VALUES (?,?,?,?,?,?)',
-                    (qd_s, yr,
-                     float(row['NSW']), float(row['QLD']),
-                     float(row['SA']),  float(row['VIC']))
-                )
-                print(f"  ✓ Inserted: {qd_s}, Year {yr}")
-                inserted += 1
-            else:
-                print(f"  ⏭  Skipped: {qd_s}, Year {yr} (already exists)")
-                skipped += 1
-
-        conn.commit()
-        print(f"✓ DB: {inserted} inserted, {skipped} skipped")
+        inserted = upsert_futures_rows(conn, new_data)
+        print(f"✓ DB: {inserted.sum()} inserted, {(~inserted).sum()} skipped")
+        return new_data[inserted]
 
     except Exception as e:
         print(f"✗ DB update error: {e}")
-        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+# ── Backfill import ────────────────────────────────────────────────────────────
+
+def _earliest_date(frames, earliest: Optional[str] = None) -> Optional[str]:
+    # Oldest Quote Date written, so the Bulk Price Index can be marked stale
+    for df in frames:
+        if df is not None and not df.empty:
+            first = min(date_text(d) for d in df['Quote Date'])
+            earliest = first if earliest is None else min(earliest, first)
+    return earliest
+
+
+def _import_csv(path: str, conn: sqlite3.Connection, chunksize: int) -> tuple:
+    # Streams the file chunk by chunk so memory stays flat regardless of size
+    inserted = skipped = 0
+    earliest = None
+    for n, chunk in enumerate(pd.read_csv(path, chunksize=chunksize), start=1):
+        chunk = chunk.dropna(subset=FUTURES_COLUMNS)
+        chunk['Quote Date'] = pd.to_datetime(chunk['Quote Date']).dt.strftime('%Y-%m-%d')
+        added = upsert_futures_rows(conn, chunk)
+        i, s  = added.sum(), (~added).sum()
+        inserted += i
+        skipped  += s
+        earliest  = _earliest_date([chunk], earliest)
+        print(f"  … chunk {n}: {i} inserted, {s} skipped")
+    return inserted, skipped, earliest
+
+
+def _import_html(path: str, conn: sqlite3.Connection) -> tuple:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        snapshot = parse_asx_snapshot(f.read())
+    if snapshot is None:
+        return 0, 0, None
+    df, contracts = snapshot
+    # FY rows first: the contract rows cover the same keys and would
+    # otherwise make every FY row count as skipped
+    added = pd.Series(dtype=bool) if df is None else upsert_futures_rows(conn, df)
+    upsert_contract_rows(conn, contracts)
+    return added.sum(), (~added).sum(), _earliest_date([df, contracts])
+
+
+def import_files(paths: list, db_file: str, table_name: str, chunksize: int = 10000,
+                 index_db_file: str = INDEX_DB_FILE_PATH):
+    """
+    Backfills the database from CSV exports (Quote Date | Year | NSW | ... ,
+    optionally gzip-compressed) and archived ASX pages (.html / .html.gz).
+    Every file is bulk-upserted, so re-importing overlapping history is safe.
+    The Bulk Price Index in index_db_file is marked stale from the oldest
+    imported date.
+    """
+    setup_database_schema(db_file, table_name)
+    conn = create_db_connection(db_file)
+    if conn is None:
+        return
+    total_inserted = total_skipped = 0
+    earliest = None
+    try:
+        for path in paths:
+            print(f"\n📥 Importing: {path}")
+            try:
+                if path.endswith(('.html', '.htm', '.html.gz', '.htm.gz')):
+                    inserted, skipped, first = _import_html(path, conn)
+                else:
+                    inserted, skipped, first = _import_csv(path, conn, chunksize)
+            except Exception as e:
+                print(f"✗ Import failed for {path}: {e}")
+                continue
+            print(f"✓ {path}: {inserted} inserted, {skipped} skipped")
+            total_inserted += inserted
+            total_skipped  += skipped
+            earliest = min(filter(None, (earliest, first)), default=None)
+    finally:
+        conn.close()
+        if earliest is not None:
+            mark_index_stale(earliest, index_db_file)
+    print(f"\n✓ Import total: {total_inserted} inserted, {total_skipped} skipped")
+
+
+# ── Archive replay ─────────────────────────────────────────────────────────────
+
+def _replay_page(path: str) -> tuple:
+    """
+    Worker: parses one archived page with the current extractor. Never
+    raises, so one bad file cannot take down the pool.
+
+    Returns (path, futures df or None, contracts df or None, error or None, log).
+    """
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rb') as f:
+                snapshot = parse_asx_snapshot(f.read())
+        if snapshot is None:
+            return path, None, None, None, log.getvalue()
+        df, contracts = snapshot
+        return path, df, contracts, None, log.getvalue()
+    except Exception as e:
+        return path, None, None, f'{type(e).__name__}: {e}', log.getvalue()
+
+
+def _archive_paths(sources: list) -> list:
+    # Directories are walked for archived pages; files are taken as given
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(asx_archive.iter_archive(source))
+        else:
+            paths.append(source)
+    return paths
+
+
+def replay_archive(
+    sources: list,
+    db_file: str,
+    table_name: str,
+    workers: Optional[int] = None,
+    batch_size: int = 250,
+    verbose: bool = False,
+    index_db_file: str = INDEX_DB_FILE_PATH,
+):
+    """
+    Re-parses every archived ASX page under sources (directories or
+    .html[.gz] files) with the current extractor across a process pool and
+    bulk-upserts the results, batch_size pages per transaction.
+
+    Pages that fail to parse are reported and skipped; weekend pages are
+    counted as closed. Pages are applied oldest market date first and, within
+    a date, in fetch order (asx_archive.iter_archive), and both FY and
+    contract rows replace stored values for the same day, so the last page
+    fetched for a date wins and re-running after an extractor fix corrects
+    history;
+    the Bulk Price Index in index_db_file is marked stale from the oldest
+    replayed date.
+    """
+    paths = _archive_paths(sources)
+    if not paths:
+        print("⏹  No archived pages found.")
+        return
+
+    setup_database_schema(db_file, table_name)
+    conn = create_db_connection(db_file)
+    if conn is None:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    print(f"\n🔁 Replaying {len(paths)} pages with {workers} workers")
+    started  = time.perf_counter()
+    inserted = skipped = contract_rows = closed = 0
+    earliest = None
+    failed   = []
+    futures, contracts = [], []
+
+    def flush():
+        nonlocal inserted, skipped, contract_rows, earliest
+        earliest = _earliest_date(futures + contracts, earliest)
+        # FY rows before contract rows, which share their keys; both latest-wins
+        if futures:
+            added = upsert_futures_rows(conn, pd.concat(futures, ignore_index=True), replace=True)
+            inserted += added.sum()
+            skipped  += (~added).sum()
+        if contracts:
+            contract_rows += upsert_contract_rows(conn, pd.concat(contracts, ignore_index=True))
+        futures.clear()
+        contracts.clear()
+
+    step = max(1, len(paths) // 20)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Chunks amortise the IPC; map() keeps archive order, which the
+            # latest-wins upserts rely on
+            chunksize = max(1, min(32, len(paths) // (4 * workers)))
+            results   = pool.map(_replay_page, paths, chunksize=chunksize)
+            for n, (path, df, page_contracts, error, log) in enumerate(results, start=1):
+                if verbose and log:
+                    print(log, end='')
+                if error:
+                    failed.append(path)
+                    print(f"✗ {path}: {error}")
+                elif page_contracts is None:
+                    closed += 1
+                else:
+                    if df is not None:
+                        futures.append(df)
+                    if not page_contracts.empty:
+                        contracts.append(page_contracts)
+
+                if n % batch_size == 0:
+                    flush()
+                if n % step == 0 or n == len(paths):
+                    print(f"  … {n}/{len(paths)} pages ({n / len(paths):.0%}), {time.perf_counter() - started:.1f}s")
+        flush()
+    finally:
+        conn.close()
+        if earliest is not None:
+            mark_index_stale(earliest, index_db_file)
+
+    print(f"\n✓ Replay: {len(paths) - len(failed) - closed} pages parsed, {closed} closed / empty, "
+          f"{len(failed)} failed in {time.perf_counter() - started:.1f}s")
+    print(f"✓ DB: {inserted} FY rows inserted, {skipped} replaced, {contract_rows} contract rows written")
+
+
+def update_contracts(contracts: pd.DataFrame, db_file: str) -> bool:
+    """Upsert the long-format contract rows for one scrape; False on failure."""
+    conn = create_db_connection(db_file)
+    if conn is None:
+        return False
+    try:
+        written = upsert_contract_rows(conn, contracts)
+        print(f"✓ DB: {written} contract rows written to {CURVE_TABLE_NAME}")
+        return True
+    except Exception as e:
+        print(f"✗ Contract update error: {e}")
+        return False
     finally:
         conn.close()
 
@@ -351,7 +521,7 @@ def verify_record_count(db_file: str, table_name: str):
 
 # ── Entry point ────────────────────────────────────────────────────────────────
 
-def main():
+def run_daily_update(force: bool = False):
     print("🚀 ASX Futures Data Update")
     print("=" * 50)
     print(f"  URL : {ASX_URL}")
@@ -360,19 +530,65 @@ def main():
 
     setup_database_schema(DB_FILE_PATH, TABLE_NAME)
 
-    new_data = scrape_asx_futures_data(ASX_URL)
+    page, snapshot = scrape_asx_snapshot(ASX_URL, force)
+    new_data = None if snapshot is None else snapshot[0]
 
+    # FY rows go in before the contract rows, which share their keys, so the
+    # CSV only receives rows that are genuinely new
+    stored   = snapshot is not None
+    inserted = None
     if new_data is not None and not new_data.empty:
         print(f"\n📊 Processing {len(new_data)} records...")
-        update_csv_file(new_data, CSV_FILE_PATH)
-        update_database(new_data, DB_FILE_PATH, TABLE_NAME)
+        inserted = update_database(new_data, DB_FILE_PATH, TABLE_NAME)
+        stored   = inserted is not None
+
+    if snapshot is not None and not snapshot[1].empty:
+        stored = update_contracts(snapshot[1], DB_FILE_PATH) and stored
+
+    if new_data is not None and not new_data.empty:
+        if inserted is not None and not inserted.empty:
+            stored = update_csv_file(inserted, CSV_FILE_PATH) and stored
         verify_record_count(DB_FILE_PATH, TABLE_NAME)
         print("\n✅ Update complete!")
     else:
         print("\n⏹  Nothing to update.")
 
+    # Only now is the page marked as seen: a failed write is retried next run
+    if stored:
+        asx_archive.record_fetch(ASX_URL, page, warn=_warn)
+
     print("=" * 50)
 
 
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description='ASX futures data updater')
+    commands = parser.add_subparsers(dest='command')
+
+    daily = commands.add_parser('daily', help='scrape today\'s curve (default)')
+    daily.add_argument('--force', action='store_true', help='parse the page even if it is unchanged')
+
+    backfill = commands.add_parser('import', help='backfill the DB from CSV files or archived ASX pages')
+    backfill.add_argument('paths', nargs='+', help='.csv[.gz] exports or .html[.gz] ASX pages')
+    backfill.add_argument('--db', default=DB_FILE_PATH, help=f'database file (default: {DB_FILE_PATH})')
+    backfill.add_argument('--chunksize', type=int, default=10000, help='CSV rows per transaction')
+
+    replay = commands.add_parser('replay', help='re-parse archived ASX pages into the DB')
+    replay.add_argument('sources', nargs='*', default=[asx_archive.ARCHIVE_DIR],
+                        help=f'archive directories or .html[.gz] pages (default: {asx_archive.ARCHIVE_DIR})')
+    replay.add_argument('--db', default=DB_FILE_PATH, help=f'database file (default: {DB_FILE_PATH})')
+    replay.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    replay.add_argument('--batch', type=int, default=250, help='pages per transaction')
+    replay.add_argument('--verbose', action='store_true', help='print the parser output of every page')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        import_files(args.paths, args.db, TABLE_NAME, args.chunksize)
+    elif args.command == 'replay':
+        replay_archive(args.sources, args.db, TABLE_NAME, args.workers, args.batch, args.verbose)
+    else:
+        run_daily_update(getattr(args, 'force', False))
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()